@@ -1,9 +1,15 @@
 """Configuration settings for the Test Generator application."""
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import cache, cached_property, lru_cache
+from pathlib import Path
+from types import SimpleNamespace
 from typing import Optional
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     """Application settings and configuration."""
@@ -41,13 +47,17 @@ class Settings(BaseSettings):
     random_test_default_questions: int = 10
     random_test_max_questions: int = 20
     
+    # Upload settings
+    max_upload_bytes: int = 20 * 1024 * 1024  # question bank uploads
+    
     # Mobile-first settings
     mobile_breakpoint: int = 768
     touch_button_min_size: int = 44
     
     # Database settings
-    database_pool_size: int = 10
+    database_pool_size: int = 0  # reader connections; 0 = size from CPU count
     database_timeout: int = 30
+    database_vfs: str = ""  # e.g. "unix-iouring" when SQLite is built with io_uring support
     
     # Logging
     log_level: str = "INFO"
@@ -55,58 +65,132 @@ class Settings(BaseSettings):
     
     # Security
     cors_enabled: bool = False
-    cors_origins: list = ["*"]
+    cors_origins: tuple[str, ...] = ("*",)
     
     # Development settings
     enable_api_docs: bool = True
     reload: bool = False
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        frozen=True,
+        validate_assignment=False,
+        extra="ignore",
+    )
 
+    @cached_property
+    def paths(self) -> SimpleNamespace:
+        """Filesystem paths parsed once into Path objects."""
+        return SimpleNamespace(
+            tests=Path(self.tests_dir),
+            db=Path(self.database_path),
+            static=Path(self.static_dir),
+            templates=Path(self.templates_dir),
+        )
 
-# Global settings instance
-settings = Settings()
+    @classmethod
+    def settings_customise_sources(
+        cls, settings_cls, init_settings, env_settings, dotenv_settings, file_secret_settings
+    ):
+        """Skip reading .env when the environment is injected (OPOQUIZ_SKIP_DOTENV=1)."""
+        if os.environ.get("OPOQUIZ_SKIP_DOTENV") == "1":
+            return init_settings, env_settings, file_secret_settings
+        return init_settings, env_settings, dotenv_settings, file_secret_settings
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings."""
-    return settings
+    """Get application settings (parsed once and cached)."""
+    return Settings()
+
+
+class _LazySettings:
+    """Settings proxy that defers parsing until first attribute access."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __repr__(self) -> str:
+        return repr(get_settings())
+
+
+# Global settings instance (lazy: importing this module does not parse .env)
+settings = _LazySettings()
+
+# (tests_dir, st_mtime_ns, files) from the last validate_test_files() scan
+_test_files_cache: Optional[tuple[str, int, list[str]]] = None
+
+
+@cache
+def _required_dirs() -> tuple[Path, ...]:
+    """Directories the application needs, derived once from settings."""
+    paths = get_settings().paths
+    return (paths.db.parent, paths.tests, paths.static, paths.templates)
+
+
+# Directories already created or verified by ensure_directories() in this process
+_DIR_READY: set[Path] = set()
 
 
 def ensure_directories():
     """Ensure required directories exist."""
-    directories = [
-        os.path.dirname(settings.database_path),
-        settings.tests_dir,
-        settings.static_dir,
-        settings.templates_dir,
-    ]
-    
-    for directory in directories:
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
-            print(f"Created directory: {directory}")
+    # mkdir the leaf directly: an existing directory costs one failed syscall,
+    # and only missing parents fall back to a recursive mkdir
+    for directory in _required_dirs():
+        if directory in _DIR_READY:
+            continue
+        try:
+            directory.mkdir()
+        except FileExistsError:
+            _DIR_READY.add(directory)
+            continue
+        except FileNotFoundError:
+            directory.mkdir(parents=True, exist_ok=True)
+        _DIR_READY.add(directory)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Created directory: %s", directory)
 
 
 def validate_test_files():
-    """Validate that test files exist and are accessible."""
-    if not os.path.exists(settings.tests_dir):
-        raise FileNotFoundError(f"Tests directory not found: {settings.tests_dir}")
-    
+    """Validate that test files exist and are accessible.
+
+    The listing is cached and reused until the directory mtime changes.
+    """
+    global _test_files_cache
+    settings = get_settings()
+    try:
+        mtime_ns = os.stat(settings.tests_dir).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Tests directory not found: {settings.tests_dir}") from None
+
+    if _test_files_cache and _test_files_cache[:2] == (settings.tests_dir, mtime_ns):
+        return list(_test_files_cache[2])
+
+    try:
+        with os.scandir(settings.tests_dir) as it:
+            test_files = [
+                entry.name for entry in it
+                if entry.name.endswith('.json') and entry.is_file()
+            ]
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Tests directory not found: {settings.tests_dir}") from None
+
     # Check for at least one test file
-    test_files = [f for f in os.listdir(settings.tests_dir) if f.endswith('.json')]
     if not test_files:
-        print(f"Warning: No test files found in {settings.tests_dir}")
-    else:
-        print(f"Found {len(test_files)} test files")
-    
-    return test_files
+        logger.warning("No test files found in %s", settings.tests_dir)
+    elif logger.isEnabledFor(logging.INFO):
+        logger.info("Found %d test files", len(test_files))
+
+    _test_files_cache = (settings.tests_dir, mtime_ns, test_files)
+    return list(test_files)
 
 
 if __name__ == "__main__":
     # For testing configuration
+    settings = get_settings()
     print("Application Configuration:")
     print(f"App Name: {settings.app_name}")
     print(f"Version: {settings.app_version}")
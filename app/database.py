@@ -2,32 +2,365 @@
 
 import aiosqlite
 import asyncio
+import heapq
+import logging
+import orjson
+import random
+import sqlite3
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import json
 import os
+import sys
+import time
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from copy import copy
+from functools import lru_cache, wraps
+from itertools import groupby
+from operator import itemgetter
+from types import MappingProxyType
+from urllib.parse import quote
 
-from app.config import get_settings
+from app.config import settings
 
-settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Bump when the DDL in _create_tables changes so existing databases re-run it
+SCHEMA_VERSION = 10
+
+# JSON codec for the *_json TEXT columns (orjson; swap here to roll back)
+_jloads = orjson.loads
+
+
+def _jdumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+# Columns only ever read back whole (session progress, question options and
+# source_info): bind orjson's bytes directly, skipping the decode to str
+# (stored as BLOB; _jloads reads both BLOB and older TEXT values). keywords_json
+# stays TEXT because the criteria query matches it with LIKE, which BLOBs fail.
+_jdumps_blob = orjson.dumps
+_EMPTY_JSON_OBJECT = _jdumps_blob({})
+
+
+# Fixed column layouts: rows are mapped by position instead of cursor.description.
+# dict(zip(COLUMNS, row)) also beats sqlite3.Row + dict(row), which rebuilds keys per row
+QUESTION_COLUMNS = (
+    'question_id', 'question_text', 'options_json', 'correct_answer', 'explanation',
+    'difficulty', 'category', 'keywords_json', 'estimated_time_seconds', 'source_info_json'
+)
+ANSWER_COLUMNS = (
+    'session_id', 'question_id', 'question_text', 'selected_answer', 'correct_answer',
+    'is_correct', 'points_available', 'points_earned', 'time_spent_seconds', 'answered_at'
+)
+BANK_COLUMNS = (
+    'bank_id', 'title', 'description', 'questions_count', 'loaded_at', 'last_updated'
+)
+SESSION_LIST_COLUMNS = (
+    'session_id', 'test_id', 'test_title', 'user_ip', 'started_at', 'completed_at',
+    'total_questions', 'correct_answers', 'score_percentage', 'duration_seconds',
+    'is_dynamic_test', 'test_type'
+)
+_QUESTION_SELECT = ', '.join(f'q.{column}' for column in QUESTION_COLUMNS)
+_CRITERIA_COLUMNS = QUESTION_COLUMNS + ('times_used', 'last_used')
+
+# Compiled statements kept per pooled connection by sqlite3, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# Hottest statements, referenced by key so every call reuses the same compiled
+# statement from the connection's cache
+HOT_SQL = {
+    'create_session': """
+        INSERT INTO test_sessions 
+        (session_id, test_id, test_title, user_ip, started_at, total_questions, is_dynamic_test, test_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'create_session_progress': """
+        INSERT INTO session_progress (session_id, questions_data, answers_data)
+        VALUES (?, ?, ?)
+    """,
+    'get_session_meta': """
+        SELECT session_id, test_id, test_title, started_at, completed_at,
+               total_questions, correct_answers, total_points, points_earned,
+               score_percentage, duration_seconds, status
+        FROM test_sessions
+        WHERE session_id = ?
+    """,
+    # Only the columns the request handlers read; see get_session_with_progress
+    'get_session': """
+        SELECT ts.session_id, ts.test_id, ts.test_title, ts.started_at, ts.completed_at,
+               ts.total_questions, ts.correct_answers, ts.total_points, ts.points_earned,
+               ts.score_percentage, ts.duration_seconds, ts.status,
+               sp.current_question_index, sp.answers_data
+        FROM test_sessions ts
+        LEFT JOIN session_progress sp ON ts.session_id = sp.session_id
+        WHERE ts.session_id = ?
+    """,
+    'get_session_answers': """
+        SELECT session_id, question_id, question_text, selected_answer, correct_answer,
+               is_correct, points_available, points_earned, time_spent_seconds, answered_at
+        FROM user_answers WHERE session_id = ? ORDER BY question_id
+    """,
+    'update_session_progress': """
+        UPDATE session_progress 
+        SET current_question_index = ?, answers_data = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE session_id = ?
+    """,
+    'update_session_index': """
+        UPDATE session_progress 
+        SET current_question_index = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE session_id = ?
+    """,
+    # answers_data may hold a BLOB written by _jdumps_blob; json_set needs text.
+    # The question id is spliced into the path as a quoted label, so callers
+    # only use this for ids without a double quote or backslash
+    'update_session_answer': """
+        UPDATE session_progress 
+        SET current_question_index = ?,
+            answers_data = json_set(COALESCE(CAST(answers_data AS TEXT), '{}'), '$."' || ? || '"', json(?)),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE session_id = ?
+    """,
+    'save_answer': """
+        INSERT INTO user_answers 
+        (session_id, question_id, question_text, selected_answer, correct_answer, 
+         is_correct, points_available, points_earned, time_spent_seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(session_id, question_id) DO UPDATE SET
+            question_text = excluded.question_text,
+            selected_answer = excluded.selected_answer,
+            correct_answer = excluded.correct_answer,
+            is_correct = excluded.is_correct,
+            points_available = excluded.points_available,
+            points_earned = excluded.points_earned,
+            time_spent_seconds = excluded.time_spent_seconds,
+            answered_at = CURRENT_TIMESTAMP
+    """,
+    # Live answer: resets the grading columns until the test is completed
+    'save_user_answer_basic': """
+        INSERT INTO user_answers 
+        (session_id, question_id, selected_answer, time_spent_seconds, 
+         correct_answer, is_correct, points_available, points_earned, answered_at)
+        VALUES (?, ?, ?, ?, 0, 0, 1, 0, CURRENT_TIMESTAMP)
+        ON CONFLICT(session_id, question_id) DO UPDATE SET
+            question_text = NULL,
+            selected_answer = excluded.selected_answer,
+            time_spent_seconds = excluded.time_spent_seconds,
+            correct_answer = 0,
+            is_correct = 0,
+            points_available = 1,
+            points_earned = 0,
+            answered_at = CURRENT_TIMESTAMP
+    """,
+    'update_answer_details': """
+        UPDATE user_answers 
+        SET question_text = ?, correct_answer = ?, is_correct = ?, 
+            points_available = ?, points_earned = ?
+        WHERE session_id = ? AND question_id = ?
+    """,
+    'update_question_usage': """
+        INSERT INTO question_usage 
+        (question_id, user_ip, times_used, last_used, correct_count, incorrect_count, updated_at)
+        VALUES (?, ?, 1, CURRENT_TIMESTAMP, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(question_id, user_ip) DO UPDATE SET
+            times_used = times_used + 1,
+            last_used = CURRENT_TIMESTAMP,
+            correct_count = correct_count + excluded.correct_count,
+            incorrect_count = incorrect_count + excluded.incorrect_count,
+            updated_at = CURRENT_TIMESTAMP
+    """,
+    'save_dynamic_test': """
+        INSERT INTO dynamic_tests 
+        (test_id, test_type, test_title, generation_criteria_json, question_ids_json, user_ip)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    'get_failed_questions': """
+        SELECT DISTINCT ua.question_id, ua.question_text,
+               ts.user_ip, COUNT(*) as times_failed
+        FROM user_answers ua
+        JOIN test_sessions ts ON ua.session_id = ts.session_id 
+        WHERE ts.user_ip = ? AND ua.is_correct = 0
+        GROUP BY ua.question_id, ua.question_text
+        ORDER BY times_failed DESC, ua.question_id
+        LIMIT ?
+    """,
+}
+
+# Read-only hot statements compiled into each reader's cache at startup
+_WARM_READS = ('get_session', 'get_session_meta', 'get_session_answers', 'get_failed_questions')
+
+
+@lru_cache(maxsize=64)
+def _criteria_query(difficulty: bool, num_categories: int, keywords: bool, exclude: bool) -> str:
+    """Candidate scan for get_questions_by_criteria, built once per filter signature.
+
+    Only ids and usage are selected and there is no ORDER BY: the anti-repetition
+    pick is done in Python so SQLite never sorts the whole filtered set.
+    """
+    query = """
+        SELECT q.question_id,
+               COALESCE(qu.times_used, 0) as times_used,
+               COALESCE(qu.last_used, '1970-01-01') as last_used
+        FROM questions q
+        LEFT JOIN question_usage qu ON q.question_id = qu.question_id AND qu.user_ip = ?
+        WHERE 1=1
+    """
+    if difficulty:
+        query += " AND q.difficulty = ?"
+    if num_categories:
+        query += f" AND q.category IN ({','.join('?' * num_categories)})"
+    if keywords:
+        # Simple keyword matching in keywords_json
+        query += " AND q.keywords_json LIKE ?"
+    if exclude:
+        # Ids staged in the reader's temp._exclude table (see get_questions_by_criteria)
+        query += " AND NOT EXISTS (SELECT 1 FROM temp._exclude e WHERE e.id = q.question_id)"
+    return query
+
+
+@lru_cache(maxsize=64)
+def _questions_by_id_query(count: int) -> str:
+    """Full question rows (plus usage) for `count` chosen ids."""
+    return f"""
+        SELECT {_QUESTION_SELECT}, 
+               COALESCE(qu.times_used, 0) as times_used,
+               COALESCE(qu.last_used, '1970-01-01') as last_used
+        FROM questions q
+        LEFT JOIN question_usage qu ON q.question_id = qu.question_id AND qu.user_ip = ?
+        WHERE q.question_id IN ({','.join('?' * count)})
+    """
+
+
+# Seconds a cached session read stays valid; writes through this manager
+# invalidate entries immediately
+SESSION_CACHE_TTL = 1.0
+SESSION_CACHE_MAX_ENTRIES = 1024
+# Failed questions of a session only change when it is written (which drops
+# the entry); the TTL just bounds how long an idle entry is kept
+FAILED_CACHE_TTL = 30.0
+
+# Completed sessions between PRAGMA optimize runs (also run on close)
+OPTIMIZE_EVERY_COMPLETIONS = 500
+
+# Writer connection of the transaction() block running in the current task, if any
+_active_transaction: ContextVar[Optional[aiosqlite.Connection]] = ContextVar('_active_transaction', default=None)
+
+
+def _bank_cached(method):
+    """Cache an argument-less async read until the question banks change.
+
+    Callers get a shallow copy, so any nested value the method returns must be
+    immutable (tuples, MappingProxyType) to keep the cached copy intact.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    async def wrapper(self):
+        cached = self._bank_cache.get(name)
+        if cached is not None and cached[0] == self._bank_version:
+            return copy(cached[1])
+        version = self._bank_version
+        value = await method(self)
+        self._bank_cache[name] = (version, value)
+        return copy(value)
+
+    return wrapper
+
+
+# Applied to every connection (WAL itself is persistent and set in init_database)
+CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA busy_timeout=5000;
+    PRAGMA cache_size=-20000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+"""
+
+# Writer only: keep dirty pages in memory until commit and cap the WAL file
+# left behind after checkpoints
+WRITER_PRAGMAS = """
+    PRAGMA cache_spill=0;
+    PRAGMA journal_size_limit=67108864;
+"""
+
+
+async def _execute_grouped(db: aiosqlite.Connection, statements) -> None:
+    """Run (sql, params) statements, one executemany per run of the same SQL."""
+    for sql, group in groupby(statements, key=itemgetter(0)):
+        await db.executemany(sql, [params for _, params in group])
 
 
 class DatabaseManager:
-    """SQLite database manager with async support."""
+    """SQLite database manager with async support.
+
+    Connections are pooled: a single writer connection serialized by a lock,
+    plus a queue of read-only connections that run concurrently under WAL.
+    """
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: int = None):
         self.db_path = db_path or settings.database_path
-        self._connection_pool = {}
+        # WAL readers run in parallel: default to one reader per CPU (plus a few
+        # for time spent waiting on I/O), like ThreadPoolExecutor's sizing
+        self._pool_size = (pool_size or settings.database_pool_size
+                           or min(32, (os.cpu_count() or 1) + 4))
+        # Optional SQLite VFS (e.g. an io_uring build); only honoured on Linux
+        self._vfs = settings.database_vfs if sys.platform.startswith('linux') else None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_lock: Optional[asyncio.Lock] = None
+        self._readers: Optional[asyncio.Queue] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._write_task: Optional[asyncio.Task] = None
+        # Synchronous read-only handle for micro-queries, used on the event-loop thread
+        self._sync_reader: Optional[sqlite3.Connection] = None
+        # Parsed JSON columns per question_id; bank content only changes on load
+        self._question_cache: Dict[str, Dict[str, Any]] = {}
+        # Bumped whenever banks are loaded or deleted; invalidates _bank_cached reads
+        self._bank_version = 0
+        self._bank_cache: Dict[str, tuple] = {}
+        # (kind, session_id) -> (loaded_at, value) for short-lived session reads
+        self._session_cache: Dict[tuple, tuple] = {}
+        self._session_loads: Dict[tuple, asyncio.Future] = {}
+        self._session_writes = 0
+        # session_id -> (loaded_at, limit, failed questions) for repeated repasos
+        self._failed_cache: Dict[str, tuple] = {}
+        # Sessions written inside the open transaction() block (None: all sessions)
+        self._transaction_sessions: Optional[set] = None
+        self._completed_since_optimize = 0
+        self._optimize_task: Optional[asyncio.Task] = None
         
     async def init_database(self):
         """Initialize database with required tables."""
+        await self.open()
         await self._create_tables()
-        print(f"Database initialized at: {self.db_path}")
+        await self._warm_statements()
+        logger.info("Database initialized at: %s", self.db_path)
     
+    async def _warm_statements(self):
+        """Compile the hot read statements into every pooled reader's statement cache."""
+        readers = [self._readers.get_nowait() for _ in range(self._readers.qsize())]
+        try:
+            for conn in readers:
+                for key in _WARM_READS:
+                    sql = HOT_SQL[key]
+                    await conn.execute_fetchall(sql, (0,) * sql.count('?'))
+        finally:
+            for conn in readers:
+                self._readers.put_nowait(conn)
+
     async def _create_tables(self):
         """Create all required database tables."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire_writer() as db:
+            ((version,),) = await db.execute_fetchall("PRAGMA user_version")
+            if version >= SCHEMA_VERSION:
+                return
+
+            # Tables created before v3 carry CHECK constraints that CREATE TABLE
+            # IF NOT EXISTS never removes: move them aside, recreate them below
+            # with the current DDL and copy the rows back
+            rebuilt = await self._set_aside_checked_tables(db)
+
             # Questions bank table (NEW)
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS questions (
@@ -38,7 +371,7 @@ class DatabaseManager:
                     options_json TEXT NOT NULL,
                     correct_answer INTEGER NOT NULL,
                     explanation TEXT,
-                    difficulty TEXT CHECK(difficulty IN ('easy', 'medium', 'hard')),
+                    difficulty TEXT,
                     category TEXT,
                     keywords_json TEXT,
                     estimated_time_seconds INTEGER DEFAULT 90,
@@ -69,7 +402,7 @@ class DatabaseManager:
                 CREATE TABLE IF NOT EXISTS dynamic_tests (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     test_id TEXT UNIQUE NOT NULL,
-                    test_type TEXT CHECK(test_type IN ('random', 'category', 'difficulty', 'failed_questions')),
+                    test_type TEXT,
                     test_title TEXT NOT NULL,
                     generation_criteria_json TEXT,
                     question_ids_json TEXT NOT NULL,
@@ -102,6 +435,8 @@ class DatabaseManager:
             """)
             
             # User answers table (UPDATED with question_id reference)
+            # The small integer columns are already compact on disk: SQLite stores 0/1
+            # in the record header alone and values up to 127 in a single byte
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS user_answers (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -130,9 +465,16 @@ class DatabaseManager:
                     file_path TEXT,
                     questions_count INTEGER DEFAULT 0,
                     loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    source_mtime_ns INTEGER,
+                    source_size INTEGER
                 )
             """)
+            # Bank file stamp (st_mtime_ns, st_size) of the last load, added in v8
+            bank_columns = {row[1] for row in await db.execute_fetchall("PRAGMA table_info(question_banks)")}
+            for column in ('source_mtime_ns', 'source_size'):
+                if column not in bank_columns:
+                    await db.execute(f"ALTER TABLE question_banks ADD COLUMN {column} INTEGER")
             
             # Test statistics table (for backward compatibility)
             await db.execute("""
@@ -162,26 +504,340 @@ class DatabaseManager:
                 )
             """)
             
+            for table in rebuilt:
+                await self._restore_set_aside_table(db, table)
+            
+            # Indexes for the hot lookups (criteria filters, failed questions,
+            # session answers and recent completed sessions)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_questions_cat_diff ON questions(category, difficulty)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_qu_user_incorrect ON question_usage(user_ip, incorrect_count DESC, last_used)")
+            # One answer per (session, question): the UNIQUE index backs the answer
+            # UPSERTs and the per-session listing ordered by question_id. Older
+            # databases may hold duplicates, keep the latest row of each pair.
+            await db.execute("""
+                DELETE FROM user_answers WHERE id NOT IN (
+                    SELECT MAX(id) FROM user_answers GROUP BY session_id, question_id
+                )
+            """)
+            await db.execute("DROP INDEX IF EXISTS idx_answers_session")
+            await db.execute("DROP INDEX IF EXISTS idx_answers_session_question")
+            await db.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_answers_sq ON user_answers(session_id, question_id)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_status_completed ON test_sessions(status, completed_at DESC)")
+            # Admin session listing: newest first with LIMIT, read straight off the index
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_completed ON test_sessions(completed_at DESC)")
+            
+            # Results counted in the legacy test_stats table whose sessions no
+            # longer exist: computed once when upgrading from a schema that
+            # still maintained test_stats (< 6), so the view keeps those totals
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS test_stats_carryover (
+                    test_id TEXT PRIMARY KEY,
+                    test_title TEXT,
+                    times_taken INTEGER NOT NULL,
+                    score_sum REAL NOT NULL,
+                    best_score REAL,
+                    worst_score REAL,
+                    total_questions INTEGER,
+                    last_taken TIMESTAMP
+                )
+            """)
+            if version < 6:
+                await db.execute("""
+                    INSERT OR REPLACE INTO test_stats_carryover
+                    SELECT l.test_id, l.test_title,
+                           l.times_taken - COALESCE(s.n, 0),
+                           l.average_score * l.times_taken - COALESCE(s.total, 0),
+                           l.best_score, l.worst_score, l.total_questions, l.last_taken
+                    FROM test_stats l
+                    LEFT JOIN (
+                        SELECT test_id, COUNT(*) AS n, SUM(score_percentage) AS total
+                        FROM test_sessions WHERE status = 'completed'
+                        GROUP BY test_id
+                    ) s ON s.test_id = l.test_id
+                    WHERE l.times_taken > COALESCE(s.n, 0)
+                """)
+            
+            # Per-test statistics computed on demand from completed sessions
+            # (served by idx_sessions_status_completed) plus the carried-over
+            # legacy totals; replaces maintaining test_stats on every completion
+            await db.execute("DROP VIEW IF EXISTS v_test_stats")
+            await db.execute("""
+                CREATE VIEW v_test_stats AS
+                SELECT test_id,
+                       COALESCE(MAX(test_title), test_id) AS test_title,
+                       SUM(n) AS times_taken,
+                       SUM(total) / SUM(n) AS average_score,
+                       MAX(best) AS best_score,
+                       MIN(worst) AS worst_score,
+                       MAX(questions) AS total_questions,
+                       MAX(last) AS last_taken
+                FROM (
+                    SELECT test_id, MAX(test_title) AS test_title, COUNT(*) AS n,
+                           SUM(score_percentage) AS total, MAX(score_percentage) AS best,
+                           MIN(score_percentage) AS worst, MAX(total_questions) AS questions,
+                           MAX(completed_at) AS last
+                    FROM test_sessions
+                    WHERE status = 'completed'
+                    GROUP BY test_id
+                    UNION ALL
+                    SELECT test_id, test_title, times_taken, score_sum, best_score,
+                           worst_score, total_questions, last_taken
+                    FROM test_stats_carryover
+                )
+                GROUP BY test_id
+            """)
+            
+            await db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
             await db.commit()
             
+    async def _set_aside_checked_tables(self, db: aiosqlite.Connection) -> List[str]:
+        """Rename tables still defined with a CHECK constraint to _legacy_<name>."""
+        rows = await db.execute_fetchall("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name IN ('questions', 'dynamic_tests') AND sql LIKE '%CHECK(%'
+        """)
+        tables = [row[0] for row in rows]
+        if tables:
+            # Keep other tables' REFERENCES pointing at the original name
+            await db.execute("PRAGMA legacy_alter_table=ON")
+            for table in tables:
+                await db.execute(f"ALTER TABLE {table} RENAME TO _legacy_{table}")
+            await db.execute("PRAGMA legacy_alter_table=OFF")
+        return tables
+
+    async def _restore_set_aside_table(self, db: aiosqlite.Connection, table: str):
+        """Copy a set-aside table's rows into its recreated table and drop it (with its indexes)."""
+        old_columns = {row[1] for row in await db.execute_fetchall(f"PRAGMA table_info(_legacy_{table})")}
+        columns = ', '.join(
+            row[1] for row in await db.execute_fetchall(f"PRAGMA table_info({table})") if row[1] in old_columns
+        )
+        await db.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM _legacy_{table}")
+        await db.execute(f"DROP TABLE _legacy_{table}")
+
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Open a connection with the per-connection PRAGMAs applied."""
+        params = {}
+        if read_only:
+            params['mode'] = 'ro'
+        if self._vfs:
+            params['vfs'] = self._vfs
+        # Readers run in autocommit mode so no implicit BEGIN ever pins a WAL snapshot
+        kwargs = {
+            'cached_statements': STATEMENT_CACHE_SIZE,
+            'isolation_level': None if read_only else "IMMEDIATE",
+        }
+        try:
+            conn = await aiosqlite.connect(self._uri(params), uri=True, **kwargs)
+        except aiosqlite.OperationalError as e:
+            if not self._vfs or 'no such vfs' not in str(e):
+                raise
+            logger.warning("SQLite VFS %r not available, using the default VFS", self._vfs)
+            self._vfs = None
+            params.pop('vfs')
+            conn = await aiosqlite.connect(self._uri(params), uri=True, **kwargs)
+        await conn.executescript(CONNECTION_PRAGMAS)
+        if not read_only:
+            await conn.executescript(WRITER_PRAGMAS)
+        else:
+            # Per-connection scratch table for get_questions_by_criteria exclusions
+            await conn.execute("CREATE TEMP TABLE IF NOT EXISTS _exclude (id TEXT PRIMARY KEY)")
+        return conn
+
+    def _connect_sync_reader(self) -> sqlite3.Connection:
+        """Open the synchronous read-only connection used by query_sync()."""
+        # Private cache on purpose: shared-cache mode is discouraged by SQLite,
+        # takes table-level locks that fail with SQLITE_LOCKED (which
+        # busy_timeout does not retry) and does not combine well with WAL
+        params = {'mode': 'ro', 'cache': 'private'}
+        if self._vfs:
+            params['vfs'] = self._vfs
+        conn = sqlite3.connect(self._uri(params), uri=True, isolation_level=None)
+        conn.executescript(CONNECTION_PRAGMAS)
+        conn.execute("PRAGMA query_only=1")
+        return conn
+
+    async def query_sync(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a tiny read query inline, skipping aiosqlite's worker-thread hop.
+
+        Only for queries that touch no table pages (such as the health
+        check's SELECT 1): the call blocks the event loop while it runs. No
+        lock is needed because nothing awaits between execute and fetchall.
+        """
+        await self.open()
+        return self._sync_reader.execute(sql, params).fetchall()
+
+    def _uri(self, params: Dict[str, str]) -> str:
+        """Build the file: URI for the database with the given query parameters."""
+        uri = f"file:{quote(os.path.abspath(self.db_path))}"
+        if params:
+            uri += '?' + '&'.join(f"{key}={value}" for key, value in params.items())
+        return uri
+
+    async def open(self):
+        """Open the writer connection and the reader pool (idempotent)."""
+        if self._writer is not None:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self._writer is not None:
+                return
+            # The writer goes first: it creates the file and switches it to WAL
+            try:
+                writer = await self._connect()
+            except aiosqlite.OperationalError:
+                # Only a first run without the data directory pays for makedirs
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+                writer = await self._connect()
+            await writer.execute_fetchall("PRAGMA journal_mode=WAL")
+            readers = asyncio.Queue()
+            for _ in range(self._pool_size):
+                readers.put_nowait(await self._connect(read_only=True))
+            self._readers = readers
+            self._sync_reader = self._connect_sync_reader()
+            self._writer_lock = asyncio.Lock()
+            self._writer = writer
+            self._write_queue = asyncio.Queue()
+            self._write_task = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        """Close all pooled connections."""
+        if self._writer is None:
+            return
+        # Flush queued writes before tearing the connections down
+        self._write_queue.put_nowait(None)
+        await self._write_task
+        if self._optimize_task is not None:
+            await self._optimize_task
+        while not self._readers.empty():
+            await self._readers.get_nowait().close()
+        self._sync_reader.close()
+        self._sync_reader = None
+        # Refresh planner statistics before the writer goes away
+        await self._writer.execute("PRAGMA optimize")
+        await self._writer.close()
+        self._writer = None
+        self._writer_lock = None
+        self._readers = None
+        self._open_lock = None
+        self._write_queue = None
+        self._write_task = None
+
     @asynccontextmanager
-    async def get_connection(self):
-        """Get database connection with proper cleanup."""
-        conn = await aiosqlite.connect(self.db_path)
+    async def acquire_reader(self):
+        """Borrow a read-only connection from the pool."""
+        await self.open()
+        readers = self._readers
+        conn = await readers.get()
         try:
             yield conn
         finally:
-            await conn.close()
+            readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def acquire_writer(self):
+        """Hold the single writer connection; uncommitted work is rolled back on error."""
+        await self.open()
+        if _active_transaction.get() is self._writer:
+            # Already held by the enclosing transaction() block
+            yield self._writer
+            return
+        async with self._writer_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the writes in the block in one transaction with a single commit.
+
+        CRUD methods called inside skip their own commit; queued writes run
+        directly on the held writer instead of going through the write queue.
+        """
+        await self.open()
+        if _active_transaction.get() is self._writer:
+            yield self._writer
+            return
+        async with self.acquire_writer() as db:
+            token = _active_transaction.set(db)
+            self._transaction_sessions = written = set()
+            try:
+                yield db
+            finally:
+                _active_transaction.reset(token)
+                self._transaction_sessions = None
+            await db.commit()
+        # Reads cached between a write and the commit still saw the old rows
+        for session_id in written:
+            self.invalidate_session(session_id)
+
+    async def _commit(self, db: aiosqlite.Connection):
+        """Commit unless the write is part of an enclosing transaction() block."""
+        if _active_transaction.get() is not db:
+            await db.commit()
+    
+    # Group-committed writes
+    async def _queue_write(self, *statements):
+        """Queue (sql, params) statements and wait until they are committed."""
+        await self.open()
+        db = _active_transaction.get()
+        if db is self._writer:
+            await _execute_grouped(db, statements)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((statements, future))
+        await future
+
+    async def _queue_session_write(self, session_id: str, *statements):
+        """Queue writes to one session and drop its cached reads once they are committed."""
+        await self._queue_write(*statements)
+        self.invalidate_session(session_id)
+
+    async def _write_loop(self):
+        """Commit queued writes in batches: whatever queues up during a commit joins the next one."""
+        queue = self._write_queue
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            stop = None in batch
+            batch = [item for item in batch if item is not None]
+            if batch:
+                await self._commit_batch(batch)
+            if stop:
+                return
+
+    async def _commit_batch(self, batch):
+        """Run a batch of queued writes in one transaction and resolve their futures."""
+        statements = [statement for item_statements, _ in batch for statement in item_statements]
+        try:
+            # acquire_writer() rolls the batch back if any statement fails
+            async with self.acquire_writer() as db:
+                await _execute_grouped(db, statements)
+                await db.commit()
+        except Exception as e:
+            if len(batch) > 1:
+                # Retry one by one so a bad write only fails its own caller
+                for item in batch:
+                    await self._commit_batch([item])
+                return
+            future = batch[0][1]
+            if not future.done():
+                future.set_exception(e)
+            return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
     
     # Session Management
     async def create_session(self, session_data: Dict[str, Any]) -> str:
         """Create a new test session."""
-        async with self.get_connection() as db:
-            await db.execute("""
-                INSERT INTO test_sessions 
-                (session_id, test_id, test_title, user_ip, started_at, total_questions, is_dynamic_test, test_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        # Both rows go to the writer as one queued item: one commit, no extra round-trips
+        await self._queue_session_write(
+            session_data['session_id'],
+            (HOT_SQL['create_session'], (
                 session_data['session_id'],
                 session_data['test_id'],
                 session_data.get('test_title', ''),
@@ -190,357 +846,422 @@ class DatabaseManager:
                 session_data['total_questions'],
                 session_data.get('is_dynamic_test', True),
                 session_data.get('test_type', 'random')
-            ))
-            
+            )),
             # Initialize session progress
-            await db.execute("""
-                INSERT INTO session_progress (session_id, questions_data, answers_data)
-                VALUES (?, ?, ?)
-            """, (
+            (HOT_SQL['create_session_progress'], (
                 session_data['session_id'],
-                json.dumps(session_data.get('question_ids', [])),
-                json.dumps({})
-            ))
+                _jdumps_blob(session_data.get('question_ids', [])),
+                _jdumps_blob({})
+            )),
+        )
+        return session_data['session_id']
+    
+    async def get_session_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get session information without the progress JOIN or JSON parsing."""
+        return await self._session_read('meta', session_id, self._fetch_session_meta)
+    
+    async def get_session_with_progress(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get session information plus its progress (current index and answers)."""
+        return await self._session_read('progress', session_id, self._fetch_session_with_progress)
+    
+    get_session = get_session_with_progress
+    
+    async def _fetch_session_meta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        async with self.acquire_reader() as db:
+            rows = await db.execute_fetchall(HOT_SQL['get_session_meta'], (session_id,))
+            if not rows:
+                return None
             
-            await db.commit()
-            return session_data['session_id']
-    
-    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session information."""
-        async with self.get_connection() as db:
-            cursor = await db.execute("""
-                SELECT ts.*, sp.current_question_index, sp.questions_data, sp.answers_data
-                FROM test_sessions ts
-                LEFT JOIN session_progress sp ON ts.session_id = sp.session_id
-                WHERE ts.session_id = ?
-            """, (session_id,))
-            
-            row = await cursor.fetchone()
-            if not row:
+            (session_id, test_id, test_title, started_at, completed_at,
+             total_questions, correct_answers, total_points, points_earned,
+             score_percentage, duration_seconds, status) = rows[0]
+            
+            return {
+                'session_id': session_id,
+                'test_id': test_id,
+                'test_title': test_title,
+                'started_at': started_at,
+                'completed_at': completed_at,
+                'total_questions': total_questions,
+                'correct_answers': correct_answers,
+                'total_points': total_points,
+                'points_earned': points_earned,
+                'score_percentage': score_percentage,
+                'duration_seconds': duration_seconds,
+                'status': status
+            }
+    
+    async def _fetch_session_with_progress(self, session_id: str) -> Optional[Dict[str, Any]]:
+        async with self.acquire_reader() as db:
+            rows = await db.execute_fetchall(HOT_SQL['get_session'], (session_id,))
+            if not rows:
                 return None
                 
-            columns = [description[0] for description in cursor.description]
-            session_data = dict(zip(columns, row))
-            
-            # Parse JSON fields
-            if session_data.get('questions_data'):
-                session_data['questions_data'] = json.loads(session_data['questions_data'])
-            if session_data.get('answers_data'):
-                session_data['answers_data'] = json.loads(session_data['answers_data'])
+            (session_id, test_id, test_title, started_at, completed_at,
+             total_questions, correct_answers, total_points, points_earned,
+             score_percentage, duration_seconds, status,
+             current_question_index, answers_data) = rows[0]
             
-            return session_data
+            return {
+                'session_id': session_id,
+                'test_id': test_id,
+                'test_title': test_title,
+                'started_at': started_at,
+                'completed_at': completed_at,
+                'total_questions': total_questions,
+                'correct_answers': correct_answers,
+                'total_points': total_points,
+                'points_earned': points_earned,
+                'score_percentage': score_percentage,
+                'duration_seconds': duration_seconds,
+                'status': status,
+                'current_question_index': current_question_index,
+                # Parse JSON field
+                'answers_data': _jloads(answers_data) if answers_data else answers_data
+            }
     
-    async def update_session_progress(self, session_id: str, current_question_index: int, answers_data: Dict):
-        """Update session progress."""
-        async with self.get_connection() as db:
-            await db.execute("""
-                UPDATE session_progress 
-                SET current_question_index = ?, answers_data = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE session_id = ?
-            """, (current_question_index, json.dumps(answers_data), session_id))
-            await db.commit()
+    async def _session_read(self, kind: str, session_id: str, fetch):
+        """Serve a session read from the short-lived cache, loading it at most once at a time."""
+        key = (kind, session_id)
+        cached = self._session_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < SESSION_CACHE_TTL:
+            return copy(cached[1])
+        
+        pending = self._session_loads.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load_session_entry(key, fetch, session_id))
+            self._session_loads[key] = pending
+            pending.add_done_callback(
+                lambda done: self._session_loads.pop(key) if self._session_loads.get(key) is done else None
+            )
+        return copy(await asyncio.shield(pending))
     
-    async def complete_session(self, session_id: str, results: Dict[str, Any]):
-        """Complete a test session with final results."""
-        async with self.get_connection() as db:
-            await db.execute("""
+    async def _load_session_entry(self, key: tuple, fetch, session_id: str):
+        writes = self._session_writes
+        value = await fetch(session_id)
+        # Only cache if no session write landed while the read was in flight
+        if writes == self._session_writes:
+            if len(self._session_cache) >= SESSION_CACHE_MAX_ENTRIES:
+                now = time.monotonic()
+                self._session_cache = {
+                    k: v for k, v in self._session_cache.items() if now - v[0] < SESSION_CACHE_TTL
+                }
+            self._session_cache[key] = (time.monotonic(), value)
+        return value
+    
+    def data_version(self) -> tuple:
+        """Counters that change whenever banks or sessions are written (for page caches)."""
+        return (self._bank_version, self._session_writes)
+    
+    def invalidate_session(self, session_id: Optional[str] = None):
+        """Drop cached reads for a session (or all sessions) after it was written."""
+        if self._transaction_sessions is not None and _active_transaction.get() is self._writer:
+            self._transaction_sessions.add(session_id)
+        self._session_writes += 1
+        if session_id is None:
+            self._session_cache.clear()
+            self._session_loads.clear()
+            self._failed_cache.clear()
+            return
+        for kind in ('meta', 'progress', 'answers'):
+            self._session_cache.pop((kind, session_id), None)
+            self._session_loads.pop((kind, session_id), None)
+        self._failed_cache.pop(session_id, None)
+    
+    async def update_session_progress(self, session_id: str, current_question_index: int, answers_data: Optional[Dict] = None):
+        """Update session progress (rewrites answers_data only when it is given)."""
+        if answers_data is None:
+            await self._queue_session_write(session_id, (HOT_SQL['update_session_index'], (current_question_index, session_id)))
+            return
+        await self._queue_session_write(session_id, (HOT_SQL['update_session_progress'], (current_question_index, _jdumps_blob(answers_data), session_id)))
+    
+    async def update_session_answer(self, session_id: str, current_question_index: int, question_id: str, answer_value: Any):
+        """Set a single answer in the session progress without rewriting the others."""
+        question_id = str(question_id)
+        if '"' in question_id or '\\' in question_id:
+            # A JSON path label cannot quote these characters portably across
+            # SQLite versions: update the dict in Python instead
+            async with self.acquire_writer() as db:
+                rows = await db.execute_fetchall(
+                    "SELECT answers_data FROM session_progress WHERE session_id = ?", (session_id,)
+                )
+                if rows:
+                    answers = _jloads(rows[0][0]) if rows[0][0] else {}
+                    answers[question_id] = answer_value
+                    await db.execute(HOT_SQL['update_session_progress'],
+                                     (current_question_index, _jdumps_blob(answers), session_id))
+                    await self._commit(db)
+            self.invalidate_session(session_id)
+            return
+        await self._queue_session_write(session_id, (
+            HOT_SQL['update_session_answer'],
+            (current_question_index, question_id, _jdumps(answer_value), session_id)
+        ))
+    
+    async def complete_session(self, session_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Complete a test session; answer totals are aggregated from user_answers in SQL."""
+        total_points = results['total_points']
+        async with self.acquire_writer() as db:
+            rows = await db.execute_fetchall("""
                 UPDATE test_sessions 
-                SET completed_at = ?, correct_answers = ?, total_points = ?, 
-                    points_earned = ?, score_percentage = ?, duration_seconds = ?, status = 'completed'
-                WHERE session_id = ?
+                SET completed_at = ?, total_points = ?, duration_seconds = ?, status = 'completed',
+                    correct_answers = a.correct,
+                    points_earned = a.earned,
+                    score_percentage = CASE WHEN ? > 0 THEN CAST(a.earned AS REAL) / ? * 100 ELSE 0 END
+                FROM (
+                    SELECT COALESCE(SUM(is_correct), 0) AS correct, COALESCE(SUM(points_earned), 0) AS earned
+                    FROM user_answers WHERE session_id = ?
+                ) AS a
+                WHERE test_sessions.session_id = ?
+                RETURNING correct_answers, points_earned, score_percentage
             """, (
                 results['completed_at'],
-                results['correct_answers'],
-                results['total_points'],
-                results['points_earned'],
-                results['score_percentage'],
+                total_points,
                 results['duration_seconds'],
+                total_points,
+                total_points,
+                session_id,
                 session_id
             ))
-            await db.commit()
+            await self._commit(db)
+        self.invalidate_session(session_id)
+        self._completed_since_optimize += 1
+        if self._completed_since_optimize >= OPTIMIZE_EVERY_COMPLETIONS and self._optimize_task is None:
+            # Off the request path: the task waits for the writer lock, so it
+            # runs after any enclosing transaction (see _optimize)
+            self._completed_since_optimize = 0
+            self._optimize_task = asyncio.create_task(self._optimize())
+        
+        correct_answers, points_earned, score_percentage = rows[0] if rows else (0, 0, 0)
+        return {
+            'correct_answers': correct_answers,
+            'points_earned': points_earned,
+            'score_percentage': score_percentage
+        }
+    
+    async def _optimize(self):
+        """Refresh planner statistics as the session tables grow."""
+        # The task inherited the caller's context, which may still hold the
+        # writer as the active transaction: clear it so acquire_writer()
+        # takes the lock instead of reusing a writer another task owns
+        _active_transaction.set(None)
+        try:
+            async with self.acquire_writer() as db:
+                await db.execute("PRAGMA optimize")
+        except Exception:
+            logger.warning("PRAGMA optimize failed", exc_info=True)
+        finally:
+            self._optimize_task = None
     
     # Question Bank Management (NEW)
-    async def load_question_bank(self, bank_data: Dict[str, Any]) -> int:
-        """Load questions from a bank into the database, avoiding duplicates."""
-        async with self.get_connection() as db:
+    def bank_changed(self):
+        """Invalidate caches derived from the question banks."""
+        self._bank_version += 1
+        self._question_cache.clear()
+
+    def _attach_parsed_json(self, question_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Add parsed options/keywords/source_info to a question row, using the cache."""
+        parsed = self._question_cache.get(question_data['question_id'])
+        if parsed is None:
+            parsed = {
+                'options': _jloads(question_data['options_json']),
+                'keywords': _jloads(question_data.get('keywords_json') or '[]'),
+                'source_info': _jloads(question_data.get('source_info_json') or '{}'),
+            }
+            self._question_cache[question_data['question_id']] = parsed
+        question_data.update(parsed)
+        return question_data
+    
+    async def load_question_bank(self, bank_data: Dict[str, Any], file_path: str = '',
+                                 source_stamp: Optional[tuple] = None) -> int:
+        """Load a validated question bank dict into the database, avoiding duplicates.
+
+        source_stamp is the bank file's (st_mtime_ns, st_size), stored for
+        the next startup's unchanged-file check.
+        """
+        async with self.acquire_writer() as db:
             bank_id = bank_data['bank_id']
+            questions = bank_data.get('questions', [])
             
             # Check if bank already exists and compare last updated
-            cursor = await db.execute("""
+            existing_bank = await db.execute_fetchall("""
                 SELECT last_updated, questions_count FROM question_banks WHERE bank_id = ?
             """, (bank_id,))
-            existing_bank = await cursor.fetchone()
             
             # If bank exists and has same number of questions, skip loading
-            if existing_bank:
-                existing_count = existing_bank[1]
-                new_count = len(bank_data.get('questions', []))
+            # (callers that pass a file stamp have already compared it instead)
+            if existing_bank and source_stamp is None:
+                existing_count = existing_bank[0][1]
+                new_count = len(questions)
                 if existing_count == new_count:
-                    print(f"📚 Skipping {bank_id}: already loaded with {existing_count} questions")
+                    logger.info("Skipping %s: already loaded with %d questions", bank_id, existing_count)
                     return 0
             
-            # Save bank metadata
-            await db.execute("""
-                INSERT OR REPLACE INTO question_banks 
-                (bank_id, title, description, file_path, questions_count, last_updated)
-                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (
-                bank_id,
-                bank_data.get('title', ''),
-                bank_data.get('description', ''),
-                bank_data.get('file_path', ''),
-                len(bank_data.get('questions', []))
-            ))
-            
-            # Delete existing questions from this bank to reload them
-            await db.execute("DELETE FROM questions WHERE bank_id = ?", (bank_id,))
-            
-            # Load questions with duplicate checking by question_id
-            questions_loaded = 0
-            for question in bank_data.get('questions', []):
-                question_id = f"{bank_id}_q{question['id'].zfill(3)}"
-                
-                # Check if question already exists (from other banks)
-                cursor = await db.execute("SELECT COUNT(*) FROM questions WHERE question_id = ?", (question_id,))
-                exists = (await cursor.fetchone())[0] > 0
-                
-                if exists:
-                    print(f"⚠️ Question {question_id} already exists, updating...")
-                    await db.execute("""
-                        UPDATE questions 
-                        SET bank_id = ?, question_text = ?, options_json = ?, correct_answer = ?, 
-                            explanation = ?, difficulty = ?, category = ?, keywords_json = ?, 
-                            estimated_time_seconds = ?, source_info_json = ?
-                        WHERE question_id = ?
-                    """, (
-                        bank_id,
-                        question['question'],
-                        json.dumps(question['options']),
-                        question['correct_answer'],
-                        question.get('explanation', ''),
-                        question.get('difficulty', 'medium'),
-                        question.get('category', ''),
-                        json.dumps(question.get('keywords', [])),
-                        question.get('estimated_time_seconds', 90),
-                        json.dumps(question.get('source_info', {})),
-                        question_id
-                    ))
-                else:
-                    await db.execute("""
-                        INSERT INTO questions 
-                        (question_id, bank_id, question_text, options_json, correct_answer, 
-                         explanation, difficulty, category, keywords_json, estimated_time_seconds, source_info_json)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        question_id,
-                        bank_id,
-                        question['question'],
-                        json.dumps(question['options']),
-                        question['correct_answer'],
-                        question.get('explanation', ''),
-                        question.get('difficulty', 'medium'),
-                        question.get('category', ''),
-                        json.dumps(question.get('keywords', [])),
-                        question.get('estimated_time_seconds', 90),
-                        json.dumps(question.get('source_info', {}))
-                    ))
-                
-                questions_loaded += 1
+            # Bank metadata, the old questions' removal and the bulk insert go to
+            # the writer thread as one job with a single commit; INSERT OR REPLACE
+            # on the UNIQUE question_id handles duplicates coming from other banks
+            rows = [
+                (
+                    f"{bank_id}_q{question['id'].zfill(3)}",
+                    bank_id,
+                    question['question'],
+                    _jdumps_blob(question['options']),
+                    question['correct_answer'],
+                    question.get('explanation', ''),
+                    question.get('difficulty', 'medium'),
+                    question.get('category', ''),
+                    _jdumps(question.get('keywords', [])),
+                    question.get('estimated_time_seconds', 90),
+                    _jdumps_blob(question['source_info']) if question.get('source_info') is not None
+                    else _EMPTY_JSON_OBJECT
+                )
+                for question in questions
+            ]
+            insert_sql = """
+                INSERT OR REPLACE INTO questions 
+                (question_id, bank_id, question_text, options_json, correct_answer, 
+                 explanation, difficulty, category, keywords_json, estimated_time_seconds, source_info_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            statements = [
+                ("""
+                    INSERT OR REPLACE INTO question_banks 
+                    (bank_id, title, description, file_path, questions_count, last_updated,
+                     source_mtime_ns, source_size)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
+                """, (
+                    bank_id,
+                    bank_data.get('title', ''),
+                    bank_data.get('description', ''),
+                    file_path,
+                    len(rows),
+                    *(source_stamp or (None, None))
+                )),
+                ("DELETE FROM questions WHERE bank_id = ?", (bank_id,)),
+            ]
+            statements.extend((insert_sql, row) for row in rows)
+            await _execute_grouped(db, statements)
+            await self._commit(db)
+            questions_loaded = len(rows)
             
-            await db.commit()
+            self.bank_changed()
             return questions_loaded
     
+    async def get_bank_file_stamps(self) -> Dict[str, tuple]:
+        """Map each loaded bank's file path to the (st_mtime_ns, st_size) it was loaded from."""
+        rows = await self._read_all("""
+            SELECT file_path, source_mtime_ns, source_size FROM question_banks
+            WHERE source_mtime_ns IS NOT NULL
+        """)
+        return {file_path: (mtime_ns, size) for file_path, mtime_ns, size in rows}
+    
     async def get_questions_by_criteria(self, criteria: Dict[str, Any], user_ip: str = None, limit: int = 10) -> List[Dict[str, Any]]:
         """Get questions based on criteria with anti-repetition logic."""
-        async with self.get_connection() as db:
-            # Build base query
-            query = """
-                SELECT q.*, 
-                       COALESCE(qu.times_used, 0) as times_used,
-                       COALESCE(qu.last_used, '1970-01-01') as last_used
-                FROM questions q
-                LEFT JOIN question_usage qu ON q.question_id = qu.question_id AND qu.user_ip = ?
-                WHERE 1=1
-            """
+        async with self.acquire_reader() as db:
             params = [user_ip or 'anonymous']
             
             # Apply filters
-            if criteria.get('difficulty'):
-                if criteria['difficulty'] != 'mixed':
-                    query += " AND q.difficulty = ?"
-                    params.append(criteria['difficulty'])
-            
-            if criteria.get('categories'):
-                categories = criteria['categories']
-                if isinstance(categories, list) and categories:
-                    placeholders = ','.join(['?' for _ in categories])
-                    query += f" AND q.category IN ({placeholders})"
-                    params.extend(categories)
-            
-            if criteria.get('keywords'):
-                # Simple keyword matching in keywords_json
-                query += " AND q.keywords_json LIKE ?"
-                params.append(f"%{criteria['keywords']}%")
-            
-            if criteria.get('exclude_question_ids'):
-                placeholders = ','.join(['?' for _ in criteria['exclude_question_ids']])
-                query += f" AND q.question_id NOT IN ({placeholders})"
-                params.extend(criteria['exclude_question_ids'])
-            
-            # Anti-repetition ordering: less used first, then older usage, then random
-            query += """
-                ORDER BY 
-                    times_used ASC,
-                    last_used ASC,
-                    RANDOM()
-                LIMIT ?
-            """
-            params.append(limit)
+            difficulty = criteria.get('difficulty')
+            if difficulty == 'mixed':
+                difficulty = None
+            if difficulty:
+                params.append(difficulty)
+            
+            categories = criteria.get('categories')
+            if not isinstance(categories, list):
+                categories = None
+            if categories:
+                params.extend(categories)
             
+            keywords = criteria.get('keywords')
+            if keywords:
+                params.append(f"%{keywords}%")
+            
+            # Stage exclusions in the connection's temp table: one bulk bind instead
+            # of a NOT IN list that can exceed SQLite's variable limit
+            excluded = criteria.get('exclude_question_ids')
+            if excluded:
+                await db.execute("DELETE FROM temp._exclude")
+                await db.executemany("INSERT OR IGNORE INTO temp._exclude VALUES (?)", [(x,) for x in excluded])
+            
+            query = _criteria_query(bool(difficulty), len(categories or ()), bool(keywords), bool(excluded))
             cursor = await db.execute(query, params)
-            rows = await cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            
-            questions = []
-            for row in rows:
-                question_data = dict(zip(columns, row))
-                # Parse JSON fields
-                question_data['options'] = json.loads(question_data['options_json'])
-                question_data['keywords'] = json.loads(question_data.get('keywords_json', '[]'))
-                question_data['source_info'] = json.loads(question_data.get('source_info_json', '{}'))
-                questions.append(question_data)
-            
-            return questions
-    
-    async def get_failed_questions(self, user_ip: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get questions that the user answered incorrectly."""
-        async with self.get_connection() as db:
-            cursor = await db.execute("""
-                SELECT DISTINCT q.*, qu.incorrect_count
-                FROM questions q
-                JOIN question_usage qu ON q.question_id = qu.question_id
-                WHERE qu.user_ip = ? AND qu.incorrect_count > 0
-                ORDER BY qu.incorrect_count DESC, qu.last_used ASC, RANDOM()
-                LIMIT ?
-            """, (user_ip, limit))
-            
-            rows = await cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            
-            questions = []
-            for row in rows:
-                question_data = dict(zip(columns, row))
-                question_data['options'] = json.loads(question_data['options_json'])
-                question_data['keywords'] = json.loads(question_data.get('keywords_json', '[]'))
-                question_data['source_info'] = json.loads(question_data.get('source_info_json', '{}'))
-                questions.append(question_data)
-            
-            return questions
-    
-    async def get_failed_questions_from_session(self, session_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get questions that the user answered incorrectly in a specific session."""
-        async with self.get_connection() as db:
-            cursor = await db.execute("""
-                SELECT DISTINCT q.*
-                FROM questions q
-                JOIN user_answers ua ON q.question_id = ua.question_id
-                WHERE ua.session_id = ? AND ua.is_correct = 0
-                ORDER BY RANDOM()
-                LIMIT ?
-            """, (session_id, limit))
-            
-            rows = await cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            
-            questions = []
-            for row in rows:
-                question_data = dict(zip(columns, row))
-                question_data['options'] = json.loads(question_data['options_json'])
-                question_data['keywords'] = json.loads(question_data.get('keywords_json', '[]'))
-                question_data['source_info'] = json.loads(question_data.get('source_info_json', '{}'))
-                questions.append(question_data)
-            
-            return questions
+            
+            # Anti-repetition pick: less used first, then older usage, then random.
+            # Streaming top-K keeps this O(N log K) instead of sorting every candidate.
+            best = []
+            rand = random.random
+            while True:
+                batch = await cursor.fetchmany(256)
+                if not batch:
+                    break
+                best = heapq.nsmallest(limit, best + [
+                    (times_used, last_used, rand(), question_id)
+                    for question_id, times_used, last_used in batch
+                ])
+            await cursor.close()
+            if not best:
+                return []
+            chosen = [item[3] for item in best]
+            
+            rows = await db.execute_fetchall(_questions_by_id_query(len(chosen)), [params[0], *chosen])
+            rows = {row[0]: row for row in rows}
+            
+            return [
+                self._attach_parsed_json(dict(zip(_CRITERIA_COLUMNS, rows[question_id])))
+                for question_id in chosen if question_id in rows
+            ]
     
     async def update_question_usage(self, question_id: str, user_ip: str, is_correct: bool):
         """Update question usage statistics."""
-        async with self.get_connection() as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO question_usage 
-                (question_id, user_ip, times_used, last_used, correct_count, incorrect_count, updated_at)
-                VALUES (
-                    ?, ?, 
-                    COALESCE((SELECT times_used FROM question_usage WHERE question_id = ? AND user_ip = ?), 0) + 1,
-                    CURRENT_TIMESTAMP,
-                    COALESCE((SELECT correct_count FROM question_usage WHERE question_id = ? AND user_ip = ?), 0) + ?,
-                    COALESCE((SELECT incorrect_count FROM question_usage WHERE question_id = ? AND user_ip = ?), 0) + ?,
-                    CURRENT_TIMESTAMP
-                )
-            """, (
-                question_id, user_ip,
-                question_id, user_ip,  # for times_used lookup
-                question_id, user_ip,  # for correct_count lookup  
-                1 if is_correct else 0,
-                question_id, user_ip,  # for incorrect_count lookup
-                0 if is_correct else 1
-            ))
-            await db.commit()
+        async with self.acquire_writer() as db:
+            await db.execute(HOT_SQL['update_question_usage'], (question_id, user_ip, int(is_correct), int(not is_correct)))
+            await self._commit(db)
     
     async def save_dynamic_test(self, test_data: Dict[str, Any]) -> str:
         """Save dynamically generated test."""
-        async with self.get_connection() as db:
-            await db.execute("""
-                INSERT INTO dynamic_tests 
-                (test_id, test_type, test_title, generation_criteria_json, question_ids_json, user_ip)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+        async with self.acquire_writer() as db:
+            await db.execute(HOT_SQL['save_dynamic_test'], (
                 test_data['test_id'],
                 test_data['test_type'],
                 test_data['test_title'],
-                json.dumps(test_data.get('criteria', {})),
-                json.dumps(test_data['question_ids']),
+                _jdumps(test_data.get('criteria', {})),
+                _jdumps(test_data['question_ids']),
                 test_data.get('user_ip')
             ))
-            await db.commit()
+            await self._commit(db)
             return test_data['test_id']
     
     async def get_dynamic_test(self, test_id: str) -> Optional[Dict[str, Any]]:
         """Get dynamic test data with questions."""
-        async with self.get_connection() as db:
+        async with self.acquire_reader() as db:
             # Get test metadata
-            cursor = await db.execute("""
+            rows = await db.execute_fetchall("""
                 SELECT test_id, test_type, test_title, generation_criteria_json, question_ids_json, created_at
                 FROM dynamic_tests 
                 WHERE test_id = ?
             """, (test_id,))
-            test_row = await cursor.fetchone()
             
-            if not test_row:
+            if not rows:
                 return None
+            test_row = rows[0]
             
             # Parse JSON fields
-            question_ids = json.loads(test_row[4])
-            criteria = json.loads(test_row[3]) if test_row[3] else {}
-            
-            print(f"DEBUG DB: question_ids from dynamic_tests: {question_ids}")
-            print(f"DEBUG DB: question_ids length: {len(question_ids) if question_ids else 0}")
+            question_ids = _jloads(test_row[4])
+            criteria = _jloads(test_row[3]) if test_row[3] else {}
             
             # Get questions in order
             if not question_ids:
-                print("DEBUG DB: No question_ids found, returning None")
                 return None
             
             placeholders = ','.join(['?' for _ in question_ids])
-            cursor = await db.execute(f"""
+            question_rows = await db.execute_fetchall(f"""
                 SELECT id, question_id, question_text, options_json, correct_answer, explanation, 
                        difficulty, category, keywords_json, estimated_time_seconds
                 FROM questions 
                 WHERE question_id IN ({placeholders})
             """, question_ids)
             
-            question_rows = await cursor.fetchall()
-            print(f"DEBUG DB: Found {len(question_rows)} question rows from database")
-            
             # Create question objects in correct order
             questions_dict = {}
             for row in question_rows:
@@ -548,12 +1269,12 @@ class DatabaseManager:
                     'id': row[0],  # id (numeric)
                     'question_id': row[1],  # question_id (text)
                     'question': row[2],  # question_text from DB
-                    'options': json.loads(row[3]) if row[3] else [],
+                    'options': _jloads(row[3]) if row[3] else [],
                     'correct_answer': row[4],
                     'explanation': row[5],
                     'difficulty': row[6],
                     'category': row[7],
-                    'keywords': json.loads(row[8]) if row[8] else [],
+                    'keywords': _jloads(row[8]) if row[8] else [],
                     'estimated_time_seconds': row[9] or 90,
                     'points': 1  # Default points for dynamic questions
                 }
@@ -573,60 +1294,63 @@ class DatabaseManager:
                 'created_at': test_row[5]
             }
     
+    @_bank_cached
     async def get_available_categories(self) -> List[str]:
         """Get all available question categories."""
-        async with self.get_connection() as db:
-            cursor = await db.execute("SELECT DISTINCT category FROM questions WHERE category IS NOT NULL AND category != '' ORDER BY category")
-            rows = await cursor.fetchall()
-            return [row[0] for row in rows]
+        rows = await self._read_all("SELECT DISTINCT category FROM questions WHERE category IS NOT NULL AND category != '' ORDER BY category")
+        return [row[0] for row in rows]
     
+    @_bank_cached
     async def get_question_stats(self) -> Dict[str, Any]:
         """Get statistics about the question bank."""
-        async with self.get_connection() as db:
-            # Total questions
-            cursor = await db.execute("SELECT COUNT(*) FROM questions")
-            total_questions = (await cursor.fetchone())[0]
-            
-            # Questions by difficulty
-            cursor = await db.execute("""
-                SELECT difficulty, COUNT(*) 
-                FROM questions 
-                GROUP BY difficulty
-                ORDER BY difficulty
-            """)
-            difficulty_stats = dict(await cursor.fetchall())
-            
-            # Questions by category
-            cursor = await db.execute("""
-                SELECT category, COUNT(*) 
-                FROM questions 
+        async with self.acquire_reader() as db:
+            # One round-trip: rows are tagged by kind (0 total, 1 banks,
+            # 2 difficulty, 3 category); column 4 orders categories by count
+            rows = await db.execute_fetchall("""
+                SELECT 0, NULL, COUNT(*), 0 FROM questions
+                UNION ALL
+                SELECT 1, NULL, COUNT(*), 0 FROM question_banks
+                UNION ALL
+                SELECT 2, difficulty, COUNT(*), 0 FROM questions GROUP BY difficulty
+                UNION ALL
+                SELECT 3, category, COUNT(*), -COUNT(*) FROM questions
                 WHERE category IS NOT NULL AND category != ''
                 GROUP BY category
-                ORDER BY COUNT(*) DESC
+                ORDER BY 1, 4, 2
             """)
-            category_stats = dict(await cursor.fetchall())
             
-            # Question banks
-            cursor = await db.execute("SELECT COUNT(*) FROM question_banks")
-            total_banks = (await cursor.fetchone())[0]
+            total_questions = total_banks = 0
+            difficulty_stats = {}
+            category_stats = {}
+            for kind, key, count, _ in rows:
+                if kind == 0:
+                    total_questions = count
+                elif kind == 1:
+                    total_banks = count
+                elif kind == 2:
+                    difficulty_stats[key] = count
+                else:
+                    category_stats[key] = count
             
+            # Read-only views: the result is shared through _bank_cached
             return {
                 'total_questions': total_questions,
                 'total_banks': total_banks,
-                'difficulty_distribution': difficulty_stats,
-                'category_distribution': category_stats
+                'difficulty_distribution': MappingProxyType(difficulty_stats),
+                'category_distribution': MappingProxyType(category_stats)
             }
     
     # Answer Management
     async def save_answer(self, session_id: str, answer_data: Dict[str, Any]):
         """Save user answer."""
-        async with self.get_connection() as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO user_answers 
-                (session_id, question_id, question_text, selected_answer, correct_answer, 
-                 is_correct, points_available, points_earned, time_spent_seconds)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        await self.save_answers_batch(session_id, [answer_data])
+    
+    async def save_answers_batch(self, session_id: str, answers: List[Dict[str, Any]]):
+        """Save several answers in one executemany and a single commit."""
+        if not answers:
+            return
+        await self._queue_session_write(session_id, *[
+            (HOT_SQL['save_answer'], (
                 session_id,
                 answer_data['question_id'],
                 answer_data.get('question_text', ''),
@@ -637,141 +1361,101 @@ class DatabaseManager:
                 answer_data.get('points_earned', 0),
                 answer_data.get('time_spent_seconds', 0)
             ))
-            await db.commit()
+            for answer_data in answers
+        ])
     
     async def save_user_answer_basic(self, session_id: str, question_id: str, selected_answer: int, time_spent_seconds: int):
         """Save basic user answer without validation (for live answer saving)."""
-        async with self.get_connection() as db:
-            # First delete any existing answer for this session/question
-            await db.execute("""
-                DELETE FROM user_answers 
-                WHERE session_id = ? AND question_id = ?
-            """, (session_id, question_id))
-            
-            # Then insert the new answer
-            await db.execute("""
-                INSERT INTO user_answers 
-                (session_id, question_id, selected_answer, time_spent_seconds, 
-                 correct_answer, is_correct, points_available, points_earned, answered_at)
-                VALUES (?, ?, ?, ?, 0, 0, 1, 0, CURRENT_TIMESTAMP)
-            """, (session_id, question_id, selected_answer, time_spent_seconds))
-            await db.commit()
+        await self._queue_session_write(
+            session_id,
+            (HOT_SQL['save_user_answer_basic'], (session_id, question_id, selected_answer, time_spent_seconds))
+        )
     
     async def update_answer_details(self, session_id: str, question_id: str, question_text: str, correct_answer: int, is_correct: bool, points_available: int, points_earned: int):
         """Update an existing answer with detailed information (for test completion)."""
-        async with self.get_connection() as db:
-            await db.execute("""
-                UPDATE user_answers 
-                SET question_text = ?, correct_answer = ?, is_correct = ?, 
-                    points_available = ?, points_earned = ?
-                WHERE session_id = ? AND question_id = ?
-            """, (question_text, correct_answer, is_correct, points_available, points_earned, session_id, question_id))
-            await db.commit()
+        await self.update_answer_details_batch(
+            session_id, [(question_id, question_text, correct_answer, is_correct, points_available, points_earned)]
+        )
+    
+    async def update_answer_details_batch(self, session_id: str, details: List[tuple]):
+        """Update many answers at once.
+
+        Each entry is (question_id, question_text, correct_answer, is_correct,
+        points_available, points_earned); all run in one executemany and commit.
+        """
+        if not details:
+            return
+        await self._queue_session_write(session_id, *[
+            (HOT_SQL['update_answer_details'], (
+                question_text, correct_answer, is_correct, points_available, points_earned,
+                session_id, question_id
+            ))
+            for question_id, question_text, correct_answer, is_correct, points_available, points_earned in details
+        ])
     
     async def get_session_answers(self, session_id: str) -> List[Dict[str, Any]]:
         """Get all answers for a session."""
-        async with self.get_connection() as db:
-            cursor = await db.execute("""
-                SELECT * FROM user_answers WHERE session_id = ? ORDER BY question_id
-            """, (session_id,))
-            
-            rows = await cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            
-            return [dict(zip(columns, row)) for row in rows]
+        return await self._session_read('answers', session_id, self._fetch_session_answers)
     
-    # Statistics
-    async def update_test_stats(self, test_id: str, test_title: str, score: float, total_questions: int):
-        """Update statistics for a test."""
-        async with self.get_connection() as db:
-            # Get current stats
-            cursor = await db.execute("SELECT * FROM test_stats WHERE test_id = ?", (test_id,))
-            current_stats = await cursor.fetchone()
-            
-            if current_stats:
-                # Update existing stats
-                times_taken = current_stats[2] + 1
-                current_avg = current_stats[3]
-                new_avg = ((current_avg * (times_taken - 1)) + score) / times_taken
-                best_score = max(current_stats[4], score)
-                worst_score = min(current_stats[5], score)
-                
-                await db.execute("""
-                    UPDATE test_stats 
-                    SET times_taken = ?, average_score = ?, best_score = ?, worst_score = ?,
-                        last_taken = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
-                    WHERE test_id = ?
-                """, (times_taken, new_avg, best_score, worst_score, test_id))
-            else:
-                # Create new stats
-                await db.execute("""
-                    INSERT INTO test_stats 
-                    (test_id, test_title, times_taken, average_score, best_score, worst_score, total_questions, last_taken)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (test_id, test_title, 1, score, score, score, total_questions))
+    async def _fetch_session_answers(self, session_id: str) -> List[Dict[str, Any]]:
+        async with self.acquire_reader() as db:
+            rows = await db.execute_fetchall(HOT_SQL['get_session_answers'], (session_id,))
             
-            await db.commit()
+            return [dict(zip(ANSWER_COLUMNS, row)) for row in rows]
     
+    # Statistics
     async def get_general_stats(self) -> Dict[str, Any]:
         """Get general application statistics."""
-        async with self.get_connection() as db:
-            # Total completed sessions
-            cursor = await db.execute("SELECT COUNT(*) FROM test_sessions WHERE status = 'completed'")
-            total_sessions = (await cursor.fetchone())[0]
-            
-            # Average score across all tests
-            cursor = await db.execute("SELECT AVG(score_percentage) FROM test_sessions WHERE status = 'completed'")
-            avg_score_result = await cursor.fetchone()
-            avg_score = avg_score_result[0] if avg_score_result[0] is not None else 0
-            
+        # The reads are independent: run them concurrently, each on its own
+        # pooled reader
+        ((total_sessions, avg_score),), recent_sessions_data, test_stats_data = await asyncio.gather(
+            # Total completed sessions and average score across all tests
+            self._read_all("""
+                SELECT COUNT(*), COALESCE(AVG(score_percentage), 0)
+                FROM test_sessions WHERE status = 'completed'
+            """),
             # Recent sessions
-            cursor = await db.execute("""
+            self._read_all("""
                 SELECT session_id, test_id, test_title, score_percentage, completed_at, duration_seconds
                 FROM test_sessions 
                 WHERE status = 'completed'
                 ORDER BY completed_at DESC 
                 LIMIT 5
-            """)
-            recent_sessions_data = await cursor.fetchall()
-            
+            """),
             # Test statistics
-            cursor = await db.execute("SELECT * FROM test_stats ORDER BY times_taken DESC")
-            test_stats_data = await cursor.fetchall()
-            
-            return {
-                'total_sessions_completed': total_sessions,
-                'average_score_all_tests': round(avg_score, 2),
-                'recent_sessions': recent_sessions_data,
-                'test_statistics': test_stats_data
-            }
+            self._read_all("""
+                SELECT test_id, test_title, times_taken, average_score, best_score,
+                       worst_score, total_questions, last_taken
+                FROM v_test_stats ORDER BY times_taken DESC
+            """),
+        )
+        
+        return {
+            'total_sessions_completed': total_sessions,
+            'average_score_all_tests': round(avg_score, 2),
+            'recent_sessions': recent_sessions_data,
+            'test_statistics': test_stats_data
+        }
+    
+    async def _read_all(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a read query on its own pooled reader and fetch all rows."""
+        async with self.acquire_reader() as db:
+            return await db.execute_fetchall(sql, params)
     
     async def health_check(self) -> bool:
         """Check if database is accessible."""
         try:
-            async with self.get_connection() as db:
-                await db.execute("SELECT 1")
-                return True
+            await self.query_sync("SELECT 1")
+            return True
         except Exception as e:
-            print(f"Database health check failed: {e}")
+            logger.warning("Database health check failed: %s", e)
             return False
     
     async def get_failed_questions(self, user_ip: str, limit: int = 20) -> List[Dict]:
         """Get failed questions for a user across all sessions."""
         try:
-            async with self.get_connection() as db:
-                query = """
-                    SELECT DISTINCT ua.question_id, ua.question_text,
-                           ts.user_ip, COUNT(*) as times_failed
-                    FROM user_answers ua
-                    JOIN test_sessions ts ON ua.session_id = ts.session_id 
-                    WHERE ts.user_ip = ? AND ua.is_correct = 0
-                    GROUP BY ua.question_id, ua.question_text
-                    ORDER BY times_failed DESC, ua.question_id
-                    LIMIT ?
-                """
-                
-                cursor = await db.execute(query, (user_ip, limit))
-                rows = await cursor.fetchall()
+            async with self.acquire_reader() as db:
+                rows = await db.execute_fetchall(HOT_SQL['get_failed_questions'], (user_ip, limit))
                 
                 failed_questions = []
                 for row in rows:
@@ -781,17 +1465,21 @@ class DatabaseManager:
                         'times_failed': row[3]
                     })
                 
-                print(f"Found {len(failed_questions)} failed questions for user {user_ip}")
+                logger.info("Found %d failed questions for user %s", len(failed_questions), user_ip)
                 return failed_questions
                 
         except Exception as e:
-            print(f"Error getting failed questions: {e}")
+            logger.warning("Error getting failed questions: %s", e)
             return []
     
     async def get_failed_questions_from_session(self, session_id: str, limit: int = 20) -> List[Dict]:
-        """Get failed questions from a specific session."""
+        """Get failed questions from a specific session (cached until the session is written)."""
+        cached = self._failed_cache.get(session_id)
+        if cached is not None and cached[1] == limit and time.monotonic() - cached[0] < FAILED_CACHE_TTL:
+            return list(cached[2])
+        writes = self._session_writes
         try:
-            async with self.get_connection() as db:
+            async with self.acquire_reader() as db:
                 query = """
                     SELECT question_id, question_text
                     FROM user_answers 
@@ -800,8 +1488,7 @@ class DatabaseManager:
                     LIMIT ?
                 """
                 
-                cursor = await db.execute(query, (session_id, limit))
-                rows = await cursor.fetchall()
+                rows = await db.execute_fetchall(query, (session_id, limit))
                 
                 failed_questions = []
                 for row in rows:
@@ -810,11 +1497,15 @@ class DatabaseManager:
                         'question_text': row[1]
                     })
                 
-                print(f"Found {len(failed_questions)} failed questions for session {session_id}")
-                return failed_questions
+                logger.info("Found %d failed questions for session %s", len(failed_questions), session_id)
+                if writes == self._session_writes:
+                    if len(self._failed_cache) >= SESSION_CACHE_MAX_ENTRIES:
+                        self._failed_cache.clear()
+                    self._failed_cache[session_id] = (time.monotonic(), limit, failed_questions)
+                return list(failed_questions)
                 
         except Exception as e:
-            print(f"Error getting failed questions from session: {e}")
+            logger.warning("Error getting failed questions from session: %s", e)
             return []
 
 
@@ -824,11 +1515,14 @@ db_manager = DatabaseManager()
 
 async def init_database():
     """Initialize database on startup."""
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(settings.database_path), exist_ok=True)
     await db_manager.init_database()
 
 
+async def close_database():
+    """Close pooled connections on shutdown."""
+    await db_manager.close()
+
+
 async def get_db_manager() -> DatabaseManager:
     """Dependency to get database manager."""
     return db_manager
@@ -838,6 +1532,7 @@ if __name__ == "__main__":
     # Test database setup
     async def test_db():
         await init_database()
+        await close_database()
         print("Database test completed successfully!")
     
     asyncio.run(test_db())
\ No newline at end of file
@@ -3,25 +3,89 @@
 from fastapi import FastAPI, Request, HTTPException, Depends, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from collections import OrderedDict, defaultdict
 from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
+import itertools
+import logging
 import os
-import json
-import uuid
+import orjson
+import time
 from typing import Dict, List, Optional, Any
 
 from app.config import get_settings, ensure_directories, validate_test_files
-from app.database import init_database, get_db_manager, DatabaseManager
+from app.database import (
+    init_database, close_database, get_db_manager, DatabaseManager,
+    BANK_COLUMNS, SESSION_LIST_COLUMNS
+)
 from app.schemas import (
     TestListResponse, TestResponse, StartSessionRequest, SessionResponse,
     QuestionResponse, SubmitAnswerRequest, CompleteTestRequest, TestResultsResponse,
     RandomTestConfig, RandomTestResponse, GeneralStats, HealthResponse, ErrorResponse,
-    TestSchema, QuestionData, AnswerDetail, CategoryPerformance, DifficultyLevel, CategoryType
+    TestSchema, QuestionData, AnswerDetail, CategoryPerformance, DifficultyLevel, CategoryType,
+    QuestionBankSchema, SourceInfo
 )
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Read size for streamed uploads
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Rendered pages and aggregate payloads keyed by name: (data_version,
+# stored_at, value). An entry is reused while the database reports no
+# writes, at most PAGE_CACHE_TTL seconds
+PAGE_CACHE_TTL = 30.0
+_page_cache: Dict[str, tuple] = {}
+
+# session_id -> test_id for active sessions (LRU). A session's test never
+# changes, so get_question can resolve it without a database read.
+SESSION_TEST_CACHE_MAX = 10_000
+
+# Generated tests kept in app.state.tests_cache; the oldest is dropped beyond
+# this (it stays in dynamic_tests, and get_question reloads it from there)
+TESTS_CACHE_MAX = 1000
+
+# Disambiguates dynamic test ids created within the same clock tick
+_test_id_counter = itertools.count()
+
+# Admin statements as module constants: the same SQL text on every call keeps
+# hitting each pooled connection's compiled-statement cache
+ADMIN_SQL = {
+    'list_banks': """
+        SELECT bank_id, title, description, questions_count, loaded_at, last_updated 
+        FROM question_banks ORDER BY last_updated DESC
+    """,
+    'list_sessions': """
+        SELECT 
+            ts.session_id,
+            ts.test_id,
+            COALESCE(dt.test_title, ts.test_title, ts.test_id) as test_title,
+            ts.user_ip,
+            ts.started_at,
+            ts.completed_at,
+            ts.total_questions,
+            ts.correct_answers,
+            ts.score_percentage,
+            ts.duration_seconds,
+            ts.is_dynamic_test,
+            ts.test_type
+        FROM test_sessions ts
+        LEFT JOIN dynamic_tests dt ON ts.test_id = dt.test_id
+        ORDER BY ts.completed_at DESC
+        LIMIT ?
+    """,
+    'bank_file_path': "SELECT file_path FROM question_banks WHERE bank_id = ?",
+    'delete_bank_questions': "DELETE FROM questions WHERE bank_id = ?",
+    'delete_bank': "DELETE FROM question_banks WHERE bank_id = ?",
+    'session_exists': "SELECT session_id FROM test_sessions WHERE session_id = ?",
+    'delete_session_answers': "DELETE FROM user_answers WHERE session_id = ?",
+    'delete_session_progress': "DELETE FROM session_progress WHERE session_id = ?",
+    'delete_session': "DELETE FROM test_sessions WHERE session_id = ?",
+}
 
 
 @asynccontextmanager
@@ -45,10 +109,15 @@ async def lifespan(app: FastAPI):
     
     # Initialize empty cache for backward compatibility
     app.state.tests_cache = {}
+    app.state.session_tests = OrderedDict()
+    _tests_changed()
+    # Rendered pages belong to the previous database manager's counters
+    _page_cache.clear()
     
     yield
     
     # Shutdown
+    await close_database()
     print("🛑 Shutting down application")
 
 
@@ -61,6 +130,7 @@ def create_app() -> FastAPI:
         description="Interactive test generator for Spanish Social Security documents",
         docs_url="/docs" if settings.enable_api_docs else None,
         redoc_url="/redoc" if settings.enable_api_docs else None,
+        default_response_class=ORJSONResponse,
         lifespan=lifespan
     )
     
@@ -68,7 +138,7 @@ def create_app() -> FastAPI:
     if settings.cors_enabled:
         app.add_middleware(
             CORSMiddleware,
-            allow_origins=settings.cors_origins,
+            allow_origins=list(settings.cors_origins),
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
@@ -91,103 +161,133 @@ app, templates = create_app()
 def normalize_test_data(test_data: Dict[str, Any]) -> Dict[str, Any]:
     """Normalize test data to handle different JSON formats."""
     normalized = test_data.copy()
+    questions = normalized.get('questions') or []
     
     # Handle created_date -> created_at
-    if 'created_date' in normalized and 'created_at' not in normalized:
-        created_date = normalized['created_date']
-        # Convert YYYY-MM-DD to ISO datetime
-        if isinstance(created_date, str) and len(created_date) == 10:
-            normalized['created_at'] = f"{created_date}T00:00:00Z"
+    created_date = normalized.get('created_date')
+    # Convert YYYY-MM-DD to ISO datetime
+    if isinstance(created_date, str) and len(created_date) == 10 and 'created_at' not in normalized:
+        normalized['created_at'] = f"{created_date}T00:00:00Z"
     
     # Handle time_limit_minutes -> estimated_duration
-    if 'time_limit_minutes' in normalized and 'estimated_duration' not in normalized:
-        normalized['estimated_duration'] = normalized['time_limit_minutes']
+    if 'time_limit_minutes' in normalized:
+        normalized.setdefault('estimated_duration', normalized['time_limit_minutes'])
     
     # Handle passing_score -> passing_grade
     if 'passing_score' in normalized and 'passing_grade' not in normalized:
-        total_questions = normalized.get('total_questions', len(normalized.get('questions', [])))
+        total_questions = normalized.get('total_questions', len(questions))
         if total_questions > 0:
             # Convert absolute score to percentage
             normalized['passing_grade'] = int((normalized['passing_score'] / total_questions) * 100)
     
     # Set defaults for missing required fields
-    if 'category' not in normalized:
-        normalized['category'] = 'general'
-    if 'difficulty' not in normalized:
-        normalized['difficulty'] = 'mixed'
+    normalized.setdefault('category', 'general')
+    normalized.setdefault('difficulty', 'mixed')
     if 'estimated_duration' not in normalized:
-        total_questions = len(normalized.get('questions', []))
         # Estimate 1.5 minutes per question
-        normalized['estimated_duration'] = max(10, int(total_questions * 1.5))
+        normalized['estimated_duration'] = max(10, int(len(questions) * 1.5))
     
     return normalized
 
 
+def _write_file(file_path: str, content: bytes | bytearray) -> None:
+    """Write raw bytes to a file (blocking; run in a thread)."""
+    with open(file_path, 'wb') as f:
+        f.write(content)
+
+
+def _read_question_bank(file_path: str) -> Dict[str, Any]:
+    """Read, validate and dump one bank file for the database (blocking; run in a thread)."""
+    with open(file_path, 'rb') as f:
+        bank_data = orjson.loads(f.read())
+    # One model_dump covers the bank and all its questions (source_info included)
+    return QuestionBankSchema.model_validate(bank_data).model_dump(mode='json')
+
+
+def _read_test_file(file_path: str) -> TestSchema:
+    """Read and validate one test file from raw bytes."""
+    with open(file_path, 'rb') as f:
+        test_data = orjson.loads(f.read())
+    return TestSchema.model_validate(test_data)
+
+
 async def load_question_banks() -> int:
     """Load all question bank files into database."""
-    from app.schemas import QuestionBankSchema
-    
-    if not os.path.exists(settings.tests_dir):
+    try:
+        with os.scandir(settings.tests_dir) as it:
+            entries = [
+                entry for entry in it
+                if entry.name.startswith('bank_') and entry.name.endswith('.json')
+                # d_type from the directory listing: no stat for regular files
+                and entry.is_file()
+            ]
+    except FileNotFoundError:
         return 0
     
     db_manager = await get_db_manager()
-    banks_loaded = 0
-    
-    for filename in os.listdir(settings.tests_dir):
-        if filename.endswith('.json') and filename.startswith('bank_'):
-            file_path = os.path.join(settings.tests_dir, filename)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    bank_data = json.load(f)
-                    bank_schema = QuestionBankSchema(**bank_data)
-                    
-                    # Prepare data for database
-                    bank_data_for_db = {
-                        'bank_id': bank_schema.bank_id,
-                        'title': bank_schema.title,
-                        'description': bank_schema.description,
-                        'file_path': file_path,
-                        'questions': []
-                    }
-                    
-                    # Convert questions
-                    for question in bank_schema.questions:
-                        question_data = {
-                            'id': question.id,
-                            'question': question.question,
-                            'options': question.options,
-                            'correct_answer': question.correct_answer,
-                            'explanation': question.explanation,
-                            'difficulty': question.difficulty,
-                            'category': question.category,
-                            'keywords': question.keywords,
-                            'estimated_time_seconds': question.estimated_time_seconds,
-                            'source_info': question.source_info.dict() if question.source_info else {}
-                        }
-                        bank_data_for_db['questions'].append(question_data)
-                    
-                    await db_manager.load_question_bank(bank_data_for_db)
-                    banks_loaded += 1
-                    print(f"📚 Loaded question bank: {bank_schema.title} ({len(bank_schema.questions)} questions)")
-                    
-            except Exception as e:
-                print(f"Error loading question bank {filename}: {e}")
-                continue
+    loaded_stamps = await db_manager.get_bank_file_stamps()
+    
+    async def load_one(entry: os.DirEntry) -> None:
+        # Files unchanged since their last load are neither parsed nor re-inserted
+        stat = entry.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if loaded_stamps.get(entry.path) == stamp:
+            logger.debug("Skipping %s: unchanged since last load", entry.name)
+            return
+        # Parsing and validation run in worker threads, overlapping with the
+        # database loads of banks that are already parsed
+        try:
+            bank_data = await asyncio.to_thread(_read_question_bank, entry.path)
+            await db_manager.load_question_bank(bank_data, entry.path, stamp)
+        except Exception as e:
+            print(f"Error loading question bank {entry.name}: {e}")
+            raise
+        print(f"📚 Loaded question bank: {bank_data['title']} ({len(bank_data['questions'])} questions)")
     
-    return banks_loaded
+    results = await asyncio.gather(*(load_one(entry) for entry in entries), return_exceptions=True)
+    return sum(1 for result in results if not isinstance(result, BaseException))
 
 
-def get_client_ip(request: Request) -> str:
-    """Get client IP address."""
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+def _test_as_dict(test_data) -> Dict[str, Any]:
+    """Normalize a test (dynamic dict or static TestSchema) to the dict format."""
+    return test_data if isinstance(test_data, dict) else test_data.model_dump(mode='json')
 
 
-def generate_session_id() -> str:
-    """Generate unique session ID."""
-    return f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+def _questions_by_id(test_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a test's questions by string id (and question_id for dynamic tests)."""
+    questions = test_data['questions']
+    by_id = {str(question.get('id', '')): question for question in questions}
+    # question_id wins over the numeric id when both are present
+    for question in questions:
+        if question.get('question_id') is not None:
+            by_id[str(question['question_id'])] = question
+    return by_id
+
+
+def _cache_get(name: str, version: tuple):
+    """Return a cached value if the data behind it is unchanged, else None."""
+    entry = _page_cache.get(name)
+    if entry and entry[0] == version and time.monotonic() - entry[1] < PAGE_CACHE_TTL:
+        return entry[2]
+    return None
+
+
+def _cache_put(name: str, version: tuple, value):
+    """Remember a value for the given data version."""
+    _page_cache[name] = (version, time.monotonic(), value)
+    return value
+
+
+def _cached_page(name: str, version: tuple) -> Optional[HTMLResponse]:
+    """Return the cached render of a page if the data behind it is unchanged."""
+    body = _cache_get(name, version)
+    return HTMLResponse(body) if body is not None else None
+
+
+def _cache_page(name: str, version: tuple, response: HTMLResponse) -> HTMLResponse:
+    """Remember a rendered page for the given data version."""
+    _cache_put(name, version, response.body)
+    return response
 
 
 # HTML Routes
@@ -198,6 +298,12 @@ async def home_page(
 ):
     """Home page with question bank statistics and test generation options."""
     try:
+        # Version read before the queries: a write racing with them makes it stale
+        version = db.data_version()
+        cached = _cached_page('home', version)
+        if cached:
+            return cached
+        
         # Get general statistics
         stats_data = await db.get_general_stats()
         
@@ -208,13 +314,13 @@ async def home_page(
         # Get available categories for test generation
         available_categories = await db.get_available_categories()
         
-        return templates.TemplateResponse("index.html", {
+        return _cache_page('home', version, templates.TemplateResponse("index.html", {
             "request": request,
             "stats": stats_data,
             "available_categories": available_categories,
             "app_name": settings.app_name,
             "app_version": settings.app_version
-        })
+        }))
         
     except Exception as e:
         print(f"Error in home_page: {e}")
@@ -233,34 +339,26 @@ async def admin_panel(
 ):
     """Admin panel for question bank management."""
     try:
+        version = db.data_version()
+        cached = _cached_page('admin', version)
+        if cached:
+            return cached
+        
         # Get question bank statistics
         question_stats = await db.get_question_stats()
         
         # Get list of question banks
-        async with db.get_connection() as conn:
-            cursor = await conn.execute("""
-                SELECT bank_id, title, description, questions_count, loaded_at, last_updated 
-                FROM question_banks ORDER BY last_updated DESC
-            """)
-            banks = await cursor.fetchall()
-        
-        bank_list = []
-        for bank in banks:
-            bank_list.append({
-                'bank_id': bank[0],
-                'title': bank[1], 
-                'description': bank[2],
-                'questions_count': bank[3],
-                'loaded_at': bank[4],
-                'last_updated': bank[5]
-            })
+        async with db.acquire_reader() as conn:
+            banks = await conn.execute_fetchall(ADMIN_SQL['list_banks'])
         
-        return templates.TemplateResponse("admin.html", {
+        bank_list = [dict(zip(BANK_COLUMNS, bank)) for bank in banks]
+        
+        return _cache_page('admin', version, templates.TemplateResponse("admin.html", {
             "request": request,
             "stats": question_stats,
             "banks": bank_list,
             "app_name": settings.app_name
-        })
+        }))
         
     except Exception as e:
         print(f"Error in admin_panel: {e}")
@@ -286,55 +384,37 @@ async def upload_question_bank(
         if not file.filename.startswith('bank_'):
             raise HTTPException(status_code=400, detail="File name must start with 'bank_'")
         
-        # Read file content
-        content = await file.read()
+        # Read file content in chunks, rejecting oversized banks early
+        max_bytes = settings.max_upload_bytes
+        if file.size is not None and file.size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Question bank file exceeds {max_bytes} bytes")
+        # orjson and the file write both take the bytearray as-is, no extra copy
+        content = bytearray()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            content += chunk
+            if len(content) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Question bank file exceeds {max_bytes} bytes")
         
         # Validate JSON structure
         try:
-            bank_data = json.loads(content.decode('utf-8'))
-        except json.JSONDecodeError as e:
+            bank_data = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
             raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
         
         # Validate against schema
-        from app.schemas import QuestionBankSchema
         try:
-            bank_schema = QuestionBankSchema(**bank_data)
+            bank_schema = QuestionBankSchema.model_validate(bank_data)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid question bank format: {str(e)}")
         
         # Save file to tests directory
         file_path = os.path.join(settings.tests_dir, file.filename)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content.decode('utf-8'))
+        await asyncio.to_thread(_write_file, file_path, content)
         
         # Load into database
-        bank_data_for_db = {
-            'bank_id': bank_schema.bank_id,
-            'title': bank_schema.title,
-            'description': bank_schema.description,
-            'file_path': file_path,
-            'questions': []
-        }
+        questions_loaded = await db.load_question_bank(bank_schema.model_dump(mode='json'), file_path)
         
-        # Convert questions
-        for question in bank_schema.questions:
-            question_data = {
-                'id': question.id,
-                'question': question.question,
-                'options': question.options,
-                'correct_answer': question.correct_answer,
-                'explanation': question.explanation,
-                'difficulty': question.difficulty,
-                'category': question.category,
-                'keywords': question.keywords,
-                'estimated_time_seconds': question.estimated_time_seconds,
-                'source_info': question.source_info.dict() if question.source_info else {}
-            }
-            bank_data_for_db['questions'].append(question_data)
-        
-        questions_loaded = await db.load_question_bank(bank_data_for_db)
-        
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "message": f"Successfully loaded {questions_loaded} questions from {bank_schema.title}",
             "bank_id": bank_schema.bank_id,
@@ -355,29 +435,32 @@ async def delete_question_bank(
 ):
     """Delete a question bank and its questions."""
     try:
-        async with db.get_connection() as conn:
+        async with db.acquire_writer() as conn:
             # Get bank info including file path
-            cursor = await conn.execute("SELECT file_path FROM question_banks WHERE bank_id = ?", (bank_id,))
-            bank = await cursor.fetchone()
+            bank = await conn.execute_fetchall(ADMIN_SQL['bank_file_path'], (bank_id,))
             
             if not bank:
                 raise HTTPException(status_code=404, detail="Question bank not found")
             
-            file_path = bank[0]
+            file_path = bank[0][0]
             
             # Delete questions from database
-            await conn.execute("DELETE FROM questions WHERE bank_id = ?", (bank_id,))
+            await conn.execute(ADMIN_SQL['delete_bank_questions'], (bank_id,))
             
             # Delete bank metadata
-            await conn.execute("DELETE FROM question_banks WHERE bank_id = ?", (bank_id,))
+            await conn.execute(ADMIN_SQL['delete_bank'], (bank_id,))
             
             await conn.commit()
-            
-            # Delete file if it exists
-            if file_path and os.path.exists(file_path):
-                os.remove(file_path)
+            db.bank_changed()
         
-        return JSONResponse({
+        # Delete file if it exists (off the event loop, after releasing the writer)
+        if file_path:
+            try:
+                await asyncio.to_thread(os.remove, file_path)
+            except FileNotFoundError:
+                pass
+        
+        return ORJSONResponse({
             "success": True,
             "message": f"Successfully deleted question bank {bank_id}"
         })
@@ -396,46 +479,17 @@ async def list_test_sessions(
 ):
     """List completed test sessions for admin management."""
     try:
-        async with db.get_connection() as conn:
-            cursor = await conn.execute("""
-                SELECT 
-                    ts.session_id,
-                    ts.test_id,
-                    COALESCE(dt.test_title, ts.test_title, ts.test_id) as test_title,
-                    ts.user_ip,
-                    ts.started_at,
-                    ts.completed_at,
-                    ts.total_questions,
-                    ts.correct_answers,
-                    ts.score_percentage,
-                    ts.duration_seconds,
-                    ts.is_dynamic_test,
-                    ts.test_type
-                FROM test_sessions ts
-                LEFT JOIN dynamic_tests dt ON ts.test_id = dt.test_id
-                ORDER BY ts.completed_at DESC
-                LIMIT ?
-            """, (limit,))
-            sessions = await cursor.fetchall()
+        async with db.acquire_reader() as conn:
+            sessions = await conn.execute_fetchall(ADMIN_SQL['list_sessions'], (limit,))
         
         session_list = []
         for session in sessions:
-            session_list.append({
-                'session_id': session[0],
-                'test_id': session[1],
-                'test_title': session[2] or f"Test {session[1]}",
-                'user_ip': session[3],
-                'started_at': session[4],
-                'completed_at': session[5],
-                'total_questions': session[6],
-                'correct_answers': session[7],
-                'score_percentage': session[8],
-                'duration_seconds': session[9],
-                'is_dynamic_test': bool(session[10]),
-                'test_type': session[11]
-            })
+            session = dict(zip(SESSION_LIST_COLUMNS, session))
+            session['test_title'] = session['test_title'] or f"Test {session['test_id']}"
+            session['is_dynamic_test'] = bool(session['is_dynamic_test'])
+            session_list.append(session)
         
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "sessions": session_list,
             "total": len(session_list)
@@ -453,22 +507,23 @@ async def delete_test_session(
 ):
     """Delete a test session and its related data."""
     try:
-        async with db.get_connection() as conn:
+        async with db.acquire_writer() as conn:
             # Check if session exists
-            cursor = await conn.execute("SELECT session_id FROM test_sessions WHERE session_id = ?", (session_id,))
-            session = await cursor.fetchone()
+            session = await conn.execute_fetchall(ADMIN_SQL['session_exists'], (session_id,))
             
             if not session:
                 raise HTTPException(status_code=404, detail="Test session not found")
             
             # Delete related data in order (foreign key constraints)
-            await conn.execute("DELETE FROM user_answers WHERE session_id = ?", (session_id,))
-            await conn.execute("DELETE FROM session_progress WHERE session_id = ?", (session_id,))
-            await conn.execute("DELETE FROM test_sessions WHERE session_id = ?", (session_id,))
+            await conn.execute(ADMIN_SQL['delete_session_answers'], (session_id,))
+            await conn.execute(ADMIN_SQL['delete_session_progress'], (session_id,))
+            await conn.execute(ADMIN_SQL['delete_session'], (session_id,))
             
             await conn.commit()
+        db.invalidate_session(session_id)
+        _forget_session_test(session_id)
         
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "message": f"Successfully deleted session {session_id}"
         })
@@ -488,7 +543,7 @@ async def test_page(
 ):
     """Test taking interface - redirect to first question."""
     try:
-        session_data = await db.get_session(session_id)
+        session_data = await db.get_session_with_progress(session_id)
         if not session_data:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -522,7 +577,7 @@ async def test_question_page(
 ):
     """Individual question page."""
     try:
-        session_data = await db.get_session(session_id)
+        session_data = await db.get_session_with_progress(session_id)
         if not session_data:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -534,51 +589,42 @@ async def test_question_page(
         
         # Get test data (dynamic or static)
         test_data = await db.get_dynamic_test(session_data['test_id'])
-        print(f"DEBUG: test_data from get_dynamic_test: {test_data is not None}")
-        if test_data:
-            print(f"DEBUG: test_data type: {type(test_data)}")
-            print(f"DEBUG: test_data keys: {list(test_data.keys()) if isinstance(test_data, dict) else 'not dict'}")
         
         if not test_data:
             # Fallback to static tests cache if dynamic test not found
             test_schema = app.state.tests_cache.get(session_data['test_id'])
-            print(f"DEBUG: fallback test_schema: {test_schema is not None}")
             if not test_schema:
                 raise HTTPException(status_code=404, detail="Test not found")
             test_data = test_schema
+        test_data = _test_as_dict(test_data)
         
-        # Get questions list (handle both dict and object formats)
-        questions = test_data['questions'] if isinstance(test_data, dict) else test_data.questions
-        print(f"DEBUG: questions length: {len(questions)}")
-        print(f"DEBUG: question_index: {question_index}")
+        # Get questions list
+        questions = test_data['questions']
         
         # Validate question index
         if question_index < 0 or question_index >= len(questions):
-            print(f"DEBUG: Question index validation failed. Index: {question_index}, Length: {len(questions)}")
             raise HTTPException(status_code=404, detail="Question not found")
         
         # Get current question
         question = questions[question_index]
-        print(f"DEBUG: question type: {type(question)}")
-        print(f"DEBUG: question keys: {list(question.keys()) if isinstance(question, dict) else 'not dict'}")
         
         # Get any existing answer for this question
         answers_data = session_data.get('answers_data', {})
-        question_id = question.get('id') if isinstance(question, dict) else question.id
+        question_id = question.get('id')
         selected_answer = answers_data.get(str(question_id))
         
         # Get answered questions for navigation
         answered_questions = [k for k in answers_data.keys() if answers_data[k] is not None]
         
         # Update current question index
-        await db.update_session_progress(session_id, question_index, answers_data)
+        await db.update_session_progress(session_id, question_index)
         
         return templates.TemplateResponse("test.html", {
             "request": request,
             "session_id": session_id,
             "test_data": {
-                "title": test_data.get('title') if isinstance(test_data, dict) else test_data.title,
-                "test_id": test_data.get('test_id') if isinstance(test_data, dict) else test_data.test_id
+                "title": test_data.get('title'),
+                "test_id": test_data.get('test_id')
             },
             "question": question,
             "current_question": question_index,
@@ -603,7 +649,7 @@ async def results_page(
 ):
     """Test results page."""
     try:
-        session_data = await db.get_session(session_id)
+        session_data = await db.get_session_meta(session_id)
         if not session_data:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -625,25 +671,20 @@ async def results_page(
             if test_schema:
                 test_data = test_schema
         
+        # Index the test's questions once instead of scanning them per answer
+        questions_by_id = _questions_by_id(_test_as_dict(test_data)) if test_data else {}
+        
+        # [correct, total] per category and per difficulty, filled in the same pass
+        category_counts = defaultdict(lambda: [0, 0])
+        difficulty_counts = defaultdict(lambda: [0, 0])
+        
         for answer in answers:
-            question = None
-            if test_data:
-                if isinstance(test_data, dict):
-                    # Dynamic test - search in questions list by string ID
-                    answer_id = str(answer['question_id'])
-                    # Try to find by question_id first, then by id
-                    question = next((q for q in test_data['questions'] if str(q.get('question_id', '')) == answer_id), None)
-                    if not question:
-                        question = next((q for q in test_data['questions'] if str(q.get('id', '')) == answer_id), None)
-                else:
-                    # Static test - search in questions list
-                    question = next((q for q in test_data.questions if q.id == answer['question_id']), None)
-                
+            question = questions_by_id.get(str(answer['question_id']))
+            
             if question:
-                # Handle both dict and object formats
-                options = question.get('options') if isinstance(question, dict) else question.options
-                explanation = question.get('explanation', '') if isinstance(question, dict) else getattr(question, 'explanation', '')
-                source_info = question.get('source_info', {}) if isinstance(question, dict) else getattr(question, 'source_info', {})
+                options = question.get('options')
+                explanation = question.get('explanation', '')
+                source_info = question.get('source_info', {})
                 
                 detailed_answers.append({
                     'question_id': answer['question_id'],
@@ -658,46 +699,24 @@ async def results_page(
                     'points_earned': answer['points_earned'],
                     'time_spent_seconds': answer['time_spent_seconds']
                 })
-        
-        print(f"DEBUG RESULTS: Built {len(detailed_answers)} detailed answers")
-        
-        # Calculate category and difficulty performance
-        category_performance = {}
-        difficulty_performance = {}
-        
-        for answer in answers:
-            question = None
-            if test_data:
-                if isinstance(test_data, dict):
-                    # Dynamic test - search in questions list
-                    question = next((q for q in test_data['questions'] if q['id'] == answer['question_id']), None)
-                else:
-                    # Static test - search in questions list
-                    question = next((q for q in test_data.questions if q.id == answer['question_id']), None)
-                    
-            if question:
-                # Handle both dict and object formats for category
-                cat = question.get('category') if isinstance(question, dict) else (question.category.value if hasattr(question.category, 'value') else str(question.category))
-                if cat not in category_performance:
-                    category_performance[cat] = {'correct': 0, 'total': 0, 'percentage': 0}
-                category_performance[cat]['total'] += 1
-                if answer['is_correct']:
-                    category_performance[cat]['correct'] += 1
                 
-                # Handle both dict and object formats for difficulty
-                diff = question.get('difficulty') if isinstance(question, dict) else (question.difficulty.value if hasattr(question.difficulty, 'value') else str(question.difficulty))
-                if diff not in difficulty_performance:
-                    difficulty_performance[diff] = {'correct': 0, 'total': 0, 'percentage': 0}
-                difficulty_performance[diff]['total'] += 1
-                if answer['is_correct']:
-                    difficulty_performance[diff]['correct'] += 1
+                correct = 1 if answer['is_correct'] else 0
+                counts = category_counts[question.get('category')]
+                counts[0] += correct
+                counts[1] += 1
+                counts = difficulty_counts[question.get('difficulty')]
+                counts[0] += correct
+                counts[1] += 1
         
-        # Calculate percentages
-        for perf in category_performance.values():
-            perf['percentage'] = (perf['correct'] / perf['total'] * 100) if perf['total'] > 0 else 0
-        
-        for perf in difficulty_performance.values():
-            perf['percentage'] = (perf['correct'] / perf['total'] * 100) if perf['total'] > 0 else 0
+        # Calculate category and difficulty performance
+        category_performance = {
+            cat: {'correct': c, 'total': t, 'percentage': c / t * 100}
+            for cat, (c, t) in category_counts.items()
+        }
+        difficulty_performance = {
+            diff: {'correct': c, 'total': t, 'percentage': c / t * 100}
+            for diff, (c, t) in difficulty_counts.items()
+        }
         
         results = {
             'session_id': session_id,
@@ -731,20 +750,26 @@ async def results_page(
 @app.get("/api/tests", response_model=TestListResponse)
 async def list_tests():
     """Get list of available tests."""
-    tests = []
-    for test_id, test_schema in app.state.tests_cache.items():
-        tests.append({
-            "test_id": test_id,
-            "title": test_schema.title,
-            "description": test_schema.description,
-            "category": test_schema.category.value,
-            "difficulty": test_schema.difficulty.value,
-            "total_questions": len(test_schema.questions),
-            "estimated_duration": test_schema.estimated_duration,
-            "passing_grade": test_schema.passing_grade
-        })
-    
-    return TestListResponse(tests=tests, total_count=len(tests))
+    # The encoded payload is reused until tests_cache changes (see _tests_changed)
+    body = app.state.tests_list_body
+    if body is None:
+        tests = []
+        for test_id, test_schema in app.state.tests_cache.items():
+            tests.append({
+                "test_id": test_id,
+                "title": test_schema.title,
+                "description": test_schema.description,
+                # CategoryType is plain str, and an unset difficulty keeps its str
+                # default; model_dump(mode='json') below turns enums into values
+                "category": test_schema.category,
+                "difficulty": test_schema.difficulty,
+                "total_questions": len(test_schema.questions),
+                "estimated_duration": test_schema.estimated_duration,
+                "passing_grade": test_schema.passing_grade
+            })
+        payload = TestListResponse(tests=tests, total_count=len(tests))
+        body = app.state.tests_list_body = orjson.dumps(payload.model_dump(mode='json'))
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/api/tests/{test_id}", response_model=TestResponse)
@@ -753,7 +778,107 @@ async def get_test(test_id: str):
     if test_id not in app.state.tests_cache:
         raise HTTPException(status_code=404, detail="Test not found")
     
-    return TestResponse(test=app.state.tests_cache[test_id])
+    body = app.state.test_bodies.get(test_id)
+    if body is None:
+        payload = TestResponse(test=app.state.tests_cache[test_id])
+        body = app.state.test_bodies[test_id] = orjson.dumps(payload.model_dump(mode='json'))
+    return Response(content=body, media_type="application/json")
+
+
+def _tests_changed(test_id: Optional[str] = None):
+    """Drop encoded /api/tests payloads after tests_cache was modified."""
+    app.state.tests_list_body = None
+    if test_id is None:
+        app.state.test_bodies = {}
+        app.state.tests_meta = {}
+    else:
+        app.state.test_bodies.pop(test_id, None)
+        app.state.tests_meta.pop(test_id, None)
+
+
+def _cache_test(test_schema: TestSchema):
+    """Add a generated test to tests_cache, evicting the oldest past TESTS_CACHE_MAX."""
+    tests_cache = app.state.tests_cache
+    tests_cache[test_schema.test_id] = test_schema
+    _tests_changed(test_schema.test_id)
+    if len(tests_cache) > TESTS_CACHE_MAX:
+        # dicts keep insertion order: the first key is the oldest test
+        oldest = next(iter(tests_cache))
+        del tests_cache[oldest]
+        _tests_changed(oldest)
+
+
+async def _load_test(db: DatabaseManager, test_id: str) -> Optional[TestSchema]:
+    """A test from tests_cache, or a generated test reloaded from dynamic_tests after eviction."""
+    test_schema = app.state.tests_cache.get(test_id)
+    if test_schema is not None:
+        return test_schema
+    test_data = await db.get_dynamic_test(test_id)
+    if not test_data:
+        return None
+    test_schema = TestSchema.model_validate({
+        'test_id': test_data['test_id'],
+        'title': test_data['title'],
+        'questions': [
+            {
+                'id': str(question['question_id']),
+                'question': question['question'],
+                'options': question['options'],
+                'correct_answer': question['correct_answer'],
+                'explanation': question['explanation'],
+                'difficulty': question['difficulty'],
+                'category': question['category'],
+                'keywords': question['keywords'],
+                'estimated_time_seconds': question['estimated_time_seconds'],
+            }
+            for question in test_data['questions']
+        ],
+    })
+    _cache_test(test_schema)
+    return test_schema
+
+
+def _test_meta(test_id: str, test_schema: TestSchema) -> Dict[str, Any]:
+    """Per-test values get_question needs, computed once per cached test."""
+    meta = app.state.tests_meta.get(test_id)
+    if meta is None:
+        questions = test_schema.questions
+        meta = app.state.tests_meta[test_id] = {
+            'total': len(questions),
+            # CategoryType is plain str; difficulty is validated into DifficultyLevel
+            'cat_values': [q.category for q in questions],
+            'diff_values': [q.difficulty.value for q in questions],
+        }
+    return meta
+
+
+def _remember_session_test(session_id: str, test_id: str):
+    """Record a session's test id, evicting the least recently used entry."""
+    cache = app.state.session_tests
+    cache[session_id] = test_id
+    cache.move_to_end(session_id)
+    if len(cache) > SESSION_TEST_CACHE_MAX:
+        cache.popitem(last=False)
+
+
+def _forget_session_test(session_id: str):
+    """Drop a completed or deleted session from the LRU."""
+    app.state.session_tests.pop(session_id, None)
+
+
+async def _session_test_id(db: DatabaseManager, session_id: str) -> Optional[str]:
+    """Test id of a session, from the in-process LRU or the database."""
+    cache = app.state.session_tests
+    test_id = cache.get(session_id)
+    if test_id is not None:
+        cache.move_to_end(session_id)
+        return test_id
+    session_data = await db.get_session_meta(session_id)
+    if not session_data:
+        return None
+    test_id = session_data['test_id']
+    _remember_session_test(session_id, test_id)
+    return test_id
 
 
 @app.post("/api/sessions", response_model=SessionResponse)
@@ -763,23 +888,17 @@ async def start_session(
     db: DatabaseManager = Depends(get_db_manager)
 ):
     """Start a new test session."""
-    print(f"[DEBUG] Starting session with request_data: {request_data}")
     test_id = request_data.test_id
-    print(f"[DEBUG] test_id: {test_id}, is_random_test: {request_data.is_random_test}")
     
     # Handle random test generation
     if test_id == 'random' or test_id == 'failed_questions' or request_data.is_random_test:
         try:
-            print(f"[DEBUG] About to call generate_random_test with config: {request_data.random_config}")
             test_schema = await generate_dynamic_random_test(request_data.random_config or {})
-            print(f"[DEBUG] Successfully generated test_schema: {test_schema.test_id}")
             test_id = test_schema.test_id
             # Store in cache temporarily
-            app.state.tests_cache[test_id] = test_schema
-        except Exception as e:
-            print(f"[ERROR] Error in generate_random_test: {e}")
-            import traceback
-            print(f"[ERROR] Full traceback: {traceback.format_exc()}")
+            _cache_test(test_schema)
+        except Exception:
+            logger.exception("Error in generate_random_test")
             raise
     elif test_id not in app.state.tests_cache:
         raise HTTPException(status_code=404, detail="Test not found")
@@ -800,6 +919,7 @@ async def start_session(
     }
     
     await db.create_session(session_data)
+    _remember_session_test(session_id, test_id)
     
     return SessionResponse(
         session_id=session_id,
@@ -818,15 +938,17 @@ async def get_question(
     db: DatabaseManager = Depends(get_db_manager)
 ):
     """Get a specific question for a session."""
-    session_data = await db.get_session(session_id)
-    if not session_data:
+    test_id = await _session_test_id(db, session_id)
+    if test_id is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    test_schema = app.state.tests_cache.get(session_data['test_id'])
+    test_schema = await _load_test(db, test_id)
     if not test_schema:
         raise HTTPException(status_code=404, detail="Test not found")
     
-    if question_index < 0 or question_index >= len(test_schema.questions):
+    meta = _test_meta(test_id, test_schema)
+    total = meta['total']
+    if question_index < 0 or question_index >= total:
         raise HTTPException(status_code=404, detail="Question not found")
     
     question = test_schema.questions[question_index]
@@ -836,12 +958,12 @@ async def get_question(
         question_id=question.id,
         question=question.question,
         options=question.options,
-        category=question.category.value if hasattr(question.category, 'value') else str(question.category),
-        difficulty=question.difficulty.value if hasattr(question.difficulty, 'value') else str(question.difficulty),
+        category=meta['cat_values'][question_index],
+        difficulty=meta['diff_values'][question_index],
         current_position=question_index + 1,
-        total_questions=len(test_schema.questions),
+        total_questions=total,
         can_go_previous=question_index > 0,
-        can_go_next=question_index < len(test_schema.questions) - 1
+        can_go_next=question_index < total - 1
     )
 
 
@@ -852,21 +974,19 @@ async def submit_answer(
     db: DatabaseManager = Depends(get_db_manager)
 ):
     """Submit an answer (without validation)."""
-    session_data = await db.get_session(session_id)
+    session_data = await db.get_session_with_progress(session_id)
     if not session_data:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Update answers in session progress
-    answers = session_data.get('answers_data', {})
-    answers[str(answer_data.question_id)] = {
-        'selected_answer': answer_data.selected_answer,
-        'time_spent_seconds': answer_data.time_spent_seconds
-    }
-    
-    await db.update_session_progress(
-        session_id, 
+    # Update this answer in session progress
+    await db.update_session_answer(
+        session_id,
         session_data.get('current_question_index', 0),
-        answers
+        str(answer_data.question_id),
+        {
+            'selected_answer': answer_data.selected_answer,
+            'time_spent_seconds': answer_data.time_spent_seconds
+        }
     )
     
     # Save basic answer immediately to ensure no data loss
@@ -887,7 +1007,7 @@ async def complete_test(
     db: DatabaseManager = Depends(get_db_manager)
 ):
     """Complete test and calculate results."""
-    session_data = await db.get_session(session_id)
+    session_data = await db.get_session_with_progress(session_id)
     if not session_data:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -899,68 +1019,66 @@ async def complete_test(
         if not test_schema:
             raise HTTPException(status_code=404, detail="Test not found")
         test_data = test_schema
+    # One format for the loop below: plain dicts, no per-field isinstance checks
+    test_data = _test_as_dict(test_data)
     
     # Calculate results
     answers_data = session_data.get('answers_data', {})
-    detailed_answers = []
+    questions = test_data['questions']
+    detailed_answers = [None] * len(questions)
+    answer_details = []
     total_points = 0
-    category_stats = {}
-    difficulty_stats = {}
+    # [correct, total] per category and per difficulty
+    category_stats = defaultdict(lambda: [0, 0])
+    difficulty_stats = defaultdict(lambda: [0, 0])
     
-    questions = test_data['questions'] if isinstance(test_data, dict) else test_data.questions
-    for question in questions:
-        # Handle both dict and object formats
+    append_detail = answer_details.append
+    construct_detail = AnswerDetail.model_construct
+    for index, question in enumerate(questions):
         # Use question_id for dynamic tests, fallback to id for static tests
-        q_id = str(question.get('question_id') if isinstance(question, dict) and question.get('question_id') else (question.get('id') if isinstance(question, dict) else question.id))
+        q_id = str(question.get('question_id') or question.get('id'))
         user_answer_data = answers_data.get(q_id, {})
         selected_answer = user_answer_data.get('selected_answer')
         
-        correct_answer = question.get('correct_answer') if isinstance(question, dict) else question.correct_answer
+        correct_answer = question['correct_answer']
         is_correct = selected_answer == correct_answer
-        question_points = question.get('points', 1) if isinstance(question, dict) else getattr(question, 'points', 1)
+        question_points = question.get('points', 1)
         
         total_points += question_points
         
-        # Category stats
-        cat = question.get('category') if isinstance(question, dict) else (question.category.value if hasattr(question.category, 'value') else question.category)
-        if cat not in category_stats:
-            category_stats[cat] = {'correct': 0, 'total': 0}
-        category_stats[cat]['total'] += 1
-        if is_correct:
-            category_stats[cat]['correct'] += 1
-        
-        # Difficulty stats  
-        diff = question.get('difficulty') if isinstance(question, dict) else (question.difficulty.value if hasattr(question.difficulty, 'value') else question.difficulty)
-        if diff not in difficulty_stats:
-            difficulty_stats[diff] = {'correct': 0, 'total': 0}
-        difficulty_stats[diff]['total'] += 1
-        if is_correct:
-            difficulty_stats[diff]['correct'] += 1
+        # Category and difficulty stats
+        bucket = category_stats[question.get('category')]
+        bucket[0] += is_correct
+        bucket[1] += 1
+        bucket = difficulty_stats[question.get('difficulty')]
+        bucket[0] += is_correct
+        bucket[1] += 1
         
         # Save answer to database
-        question_text = question.get('question') if isinstance(question, dict) else question.question
-        options = question.get('options') if isinstance(question, dict) else question.options
-        explanation = question.get('explanation', '') if isinstance(question, dict) else getattr(question, 'explanation', '')
-        source_info_raw = question.get('source_info', {}) if isinstance(question, dict) else getattr(question, 'source_info', {})
+        question_text = question.get('question')
+        options = question.get('options')
+        explanation = question.get('explanation', '')
+        source_info_raw = question.get('source_info', {})
         
         # Convert source_info to proper format or None for Pydantic validation
         source_info = None
         if source_info_raw and isinstance(source_info_raw, dict) and source_info_raw.get('document'):
-            source_info = source_info_raw
+            source_info = SourceInfo.model_validate(source_info_raw)
         
-        # Update existing answer with detailed information
-        await db.update_answer_details(
-            session_id,
-            str(q_id),
+        # Update existing answer with detailed information (written in one batch below)
+        append_detail((
+            q_id,
             question_text,
             correct_answer,
             is_correct,
             question_points,
             question_points if is_correct else 0
-        )
+        ))
         
-        detailed_answers.append(AnswerDetail(
-            question_id=str(q_id),
+        # Every field comes from validated test data or is computed here:
+        # model_construct skips re-validating them for each answer
+        detailed_answers[index] = construct_detail(
+            question_id=q_id,
             question_text=question_text,
             selected_answer=selected_answer if selected_answer is not None else -1,
             correct_answer=correct_answer,
@@ -971,54 +1089,46 @@ async def complete_test(
             source_info=source_info,
             points_earned=question_points if is_correct else 0,
             time_spent_seconds=user_answer_data.get('time_spent_seconds', 0)
-        ))
-    
-    # Calculate final metrics from database after all answers are updated
-    async with db.get_connection() as conn:
-        cursor = await conn.execute("SELECT SUM(is_correct), SUM(points_earned) FROM user_answers WHERE session_id = ?", (session_id,))
-        db_result = await cursor.fetchone()
-        correct_count = int(db_result[0]) if db_result[0] else 0
-        points_earned = int(db_result[1]) if db_result[1] else 0
+        )
     
-    percentage = (points_earned / total_points * 100) if total_points > 0 else 0
-    duration = int((datetime.now() - datetime.fromisoformat(session_data['started_at'].replace('Z', '+00:00'))).total_seconds())
-    passing_grade = test_data.get('passing_grade', 70) if isinstance(test_data, dict) else getattr(test_data, 'passing_grade', 70)
-    passed = percentage >= passing_grade
+    # fromisoformat accepts a trailing 'Z' since Python 3.11
+    started_at = datetime.fromisoformat(session_data['started_at'])
+    now = datetime.now(started_at.tzinfo)
+    duration = int((now - started_at).total_seconds())
+    test_id = test_data.get('test_id')
+    question_count = len(questions)
     
-    # Complete session
-    await db.complete_session(session_id, {
-        'completed_at': datetime.now(),
-        'correct_answers': correct_count,
-        'total_points': total_points,
-        'points_earned': points_earned,
-        'score_percentage': percentage,
-        'duration_seconds': duration
-    })
+    # Answer details and session completion commit together; per-test
+    # statistics are derived from completed sessions (v_test_stats)
+    async with db.transaction():
+        await db.update_answer_details_batch(session_id, answer_details)
+        
+        # Complete session; final metrics are aggregated from the updated answers in SQL
+        final = await db.complete_session(session_id, {
+            'completed_at': now,
+            'total_points': total_points,
+            'duration_seconds': duration
+        })
+        correct_count = final['correct_answers']
+        points_earned = final['points_earned']
+        percentage = final['score_percentage']
+    _forget_session_test(session_id)
     
-    # Update test statistics
-    test_id = test_data.get('test_id') if isinstance(test_data, dict) else test_data.test_id
-    test_title = test_data.get('title') if isinstance(test_data, dict) else test_data.title
-    question_count = len(questions)
-    await db.update_test_stats(test_id, test_title, percentage, question_count)
+    passing_grade = test_data.get('passing_grade', 70)
+    passed = percentage >= passing_grade
     
     # Build category performance
-    category_performance = {}
-    for cat, stats in category_stats.items():
-        category_performance[cat] = CategoryPerformance(
-            correct=stats['correct'],
-            total=stats['total'],
-            percentage=stats['correct'] / stats['total'] * 100 if stats['total'] > 0 else 0
-        )
+    category_performance = {
+        cat: CategoryPerformance(correct=correct, total=total, percentage=correct / total * 100)
+        for cat, (correct, total) in category_stats.items()
+    }
     
-    difficulty_performance = {}
-    for diff, stats in difficulty_stats.items():
-        difficulty_performance[diff] = CategoryPerformance(
-            correct=stats['correct'],
-            total=stats['total'],
-            percentage=stats['correct'] / stats['total'] * 100 if stats['total'] > 0 else 0
-        )
+    difficulty_performance = {
+        diff: CategoryPerformance(correct=correct, total=total, percentage=correct / total * 100)
+        for diff, (correct, total) in difficulty_stats.items()
+    }
     
-    return TestResultsResponse(
+    results = TestResultsResponse(
         session_id=session_id,
         test_id=test_id,
         score=correct_count,
@@ -1028,16 +1138,25 @@ async def complete_test(
         percentage=round(percentage, 2),
         duration_seconds=duration,
         passed=passed,
-        completed_at=datetime.now(),
+        completed_at=now,
         category_performance=category_performance,
         difficulty_performance=difficulty_performance,
         detailed_answers=detailed_answers
     )
+    # The model is built from validated values: dump it once and skip
+    # FastAPI's response_model re-validation of detailed_answers
+    return ORJSONResponse(results.model_dump(mode='json'))
 
 
 @app.get("/api/stats", response_model=GeneralStats)
 async def get_stats(db: DatabaseManager = Depends(get_db_manager)):
     """Get general application statistics."""
+    # Polled by dashboards: reuse the encoded body until sessions or tests change
+    version = (db.data_version(), len(app.state.tests_cache))
+    body = _cache_get('api-stats', version)
+    if body is not None:
+        return Response(body, media_type="application/json")
+    
     stats_data = await db.get_general_stats()
     
     # Process recent sessions
@@ -1065,13 +1184,17 @@ async def get_stats(db: DatabaseManager = Depends(get_db_manager)):
             'last_taken': test_stat_data[7]
         })
     
-    return GeneralStats(
+    stats = GeneralStats(
         total_tests_available=len(app.state.tests_cache),
         total_sessions_completed=stats_data['total_sessions_completed'],
         average_score_all_tests=stats_data['average_score_all_tests'],
         recent_sessions=recent_sessions,
         test_statistics=test_statistics
     )
+    return Response(
+        _cache_put('api-stats', version, orjson.dumps(stats.model_dump(mode='json'))),
+        media_type="application/json"
+    )
 
 
 @app.get("/api/categories")
@@ -1093,30 +1216,36 @@ async def get_test_configuration(
 ):
     """Get available test configuration options."""
     try:
-        # Get available categories
-        categories = await db.get_available_categories()
-        
-        # Get question statistics  
-        question_stats = await db.get_question_stats()
+        # Category and difficulty counts are shared by all clients; only the
+        # failed-questions flag is per user
+        version = db.data_version()
+        config = _cache_get('api-test-config', version)
+        if config is None:
+            # Get available categories
+            categories = await db.get_available_categories()
+            
+            # Get question statistics  
+            question_stats = await db.get_question_stats()
+            
+            config = _cache_put('api-test-config', version, {
+                "available_categories": [
+                    {"category": cat, "question_count": question_stats.get("category_distribution", {}).get(cat, 0)}
+                    for cat in categories
+                ],
+                "available_difficulties": [
+                    {"difficulty": "easy", "question_count": question_stats.get("difficulty_distribution", {}).get("easy", 0)},
+                    {"difficulty": "medium", "question_count": question_stats.get("difficulty_distribution", {}).get("medium", 0)},
+                    {"difficulty": "hard", "question_count": question_stats.get("difficulty_distribution", {}).get("hard", 0)},
+                    {"difficulty": "mixed", "question_count": question_stats.get("total_questions", 0)}
+                ],
+                "total_questions": question_stats.get("total_questions", 0),
+            })
         
         # Check if user has failed questions
         user_ip = get_client_ip(request)
         failed_questions = await db.get_failed_questions(user_ip, 1)
         
-        return {
-            "available_categories": [
-                {"category": cat, "question_count": question_stats.get("category_distribution", {}).get(cat, 0)}
-                for cat in categories
-            ],
-            "available_difficulties": [
-                {"difficulty": "easy", "question_count": question_stats.get("difficulty_distribution", {}).get("easy", 0)},
-                {"difficulty": "medium", "question_count": question_stats.get("difficulty_distribution", {}).get("medium", 0)},
-                {"difficulty": "hard", "question_count": question_stats.get("difficulty_distribution", {}).get("hard", 0)},
-                {"difficulty": "mixed", "question_count": question_stats.get("total_questions", 0)}
-            ],
-            "total_questions": question_stats.get("total_questions", 0),
-            "has_failed_questions": len(failed_questions) > 0
-        }
+        return {**config, "has_failed_questions": len(failed_questions) > 0}
     except Exception as e:
         print(f"Error in get_test_configuration: {e}")
         raise HTTPException(status_code=500, detail="Error getting test configuration")
@@ -1130,8 +1259,6 @@ async def generate_dynamic_test(
 ):
     """Generate a dynamic test based on specified criteria."""
     try:
-        from app.schemas import TestGenerationType
-        
         user_ip = get_client_ip(request)
         test_type = test_request.get("test_type", "random")
         num_questions = test_request.get("num_questions", 50)
@@ -1141,112 +1268,72 @@ async def generate_dynamic_test(
             raise HTTPException(status_code=400, detail="Number of questions must be between 5 and 100")
         
         # Build criteria based on test type
-        criteria = {}
-        test_title = ""
+        config_get = (test_request.get("config") or {}).get
+        source_session_id = None
         
         if test_type == "random":
-            test_title = f"Test Aleatorio - {num_questions} preguntas"
             criteria = {}
             
         elif test_type == "category":
-            config = test_request.get("config", {})
-            categories = config.get("categories", [])
+            categories = config_get("categories", [])
             if not categories:
                 raise HTTPException(status_code=400, detail="At least one category must be selected")
             criteria = {"categories": categories}
-            test_title = f"Test por Categorías - {num_questions} preguntas"
             
         elif test_type == "difficulty":
-            config = test_request.get("config", {})
-            difficulty = config.get("difficulty", "medium")
-            criteria = {"difficulty": difficulty}
-            test_title = f"Test {difficulty.title()} - {num_questions} preguntas"
+            criteria = {"difficulty": config_get("difficulty", "medium")}
             
         elif test_type == "failed_questions":
-            config = test_request.get("config", {})
-            source_session_id = config.get("source_session_id")
-            if not source_session_id:
-                # Get failed questions for this user
-                failed_questions = await db.get_failed_questions(user_ip, num_questions)
-                if not failed_questions:
-                    raise HTTPException(status_code=400, detail="No failed questions found for this user")
-                question_ids = [q['question_id'] for q in failed_questions]
-                criteria = {"question_ids": question_ids}
-                test_title = f"Repaso de Errores - {len(question_ids)} preguntas"
-            else:
-                # Get failed questions from specific session
-                failed_questions = await db.get_failed_questions_from_session(source_session_id, num_questions)
-                if not failed_questions:
-                    raise HTTPException(status_code=400, detail="No failed questions found in the specified session")
-                question_ids = [q['question_id'] for q in failed_questions]
-                criteria = {"question_ids": question_ids}
-                test_title = f"Repaso de Errores - {len(question_ids)} preguntas de sesión {source_session_id}"
+            criteria = {}
+            source_session_id = config_get("source_session_id")
         
         else:
             raise HTTPException(status_code=400, detail="Invalid test type")
         
-        # Get questions based on criteria
-        if test_type == "failed_questions" and 'question_ids' in locals():
-            # Use specific failed questions
-            questions = await db.get_failed_questions(user_ip, num_questions)
-        else:
-            # Get questions by criteria with anti-repetition
-            questions = await db.get_questions_by_criteria(criteria, user_ip, num_questions)
-        
-        if not questions:
-            raise HTTPException(status_code=400, detail="No questions available matching the specified criteria")
-        
-        if len(questions) < num_questions:
-            num_questions = len(questions)
-        
-        # Calculate estimated duration based on question times
-        estimated_duration_seconds = sum(q.get('estimated_time_seconds', 90) for q in questions)
-        estimated_duration_minutes = round(estimated_duration_seconds / 60)
-        
-        # Generate test ID
-        test_id = f"dyn_{test_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-        
-        # Save dynamic test
-        await db.save_dynamic_test({
-            'test_id': test_id,
-            'test_type': test_type,
-            'test_title': test_title,
-            'criteria': criteria,
-            'question_ids': [q['question_id'] for q in questions],
-            'user_ip': user_ip
-        })
-        
-        # Create session for this test
         session_id = generate_session_id()
         
-        await db.create_session({
-            'session_id': session_id,
-            'test_id': test_id,
-            'test_title': test_title,
-            'user_ip': user_ip,
-            'started_at': datetime.now().isoformat(),
-            'total_questions': num_questions,
-            'is_dynamic_test': True,
-            'test_type': test_type,
-            'question_ids': [q['question_id'] for q in questions]
-        })
+        # Test and session are committed together
+        async with db.transaction():
+            test_data = await _build_dynamic_test(
+                db, user_ip, test_type, criteria, num_questions,
+                failed=test_type == "failed_questions", source_session_id=source_session_id
+            )
+            if test_data is None:
+                if test_type != "failed_questions":
+                    detail = "No questions available matching the specified criteria"
+                elif source_session_id:
+                    detail = "No failed questions found in the specified session"
+                else:
+                    detail = "No failed questions found for this user"
+                raise HTTPException(status_code=400, detail=detail)
+            
+            # Create session for this test
+            await db.create_session({
+                'session_id': session_id,
+                'test_id': test_data['test_id'],
+                'test_title': test_data['title'],
+                'user_ip': user_ip,
+                'started_at': datetime.now().isoformat(),
+                'total_questions': len(test_data['question_ids']),
+                'is_dynamic_test': True,
+                'test_type': test_type,
+                'question_ids': test_data['question_ids']
+            })
         
         return {
-            "test_id": test_id,
+            "test_id": test_data['test_id'],
             "session_id": session_id,
             "test_type": test_type,
-            "title": test_title,
-            "num_questions": num_questions,
-            "estimated_duration_minutes": estimated_duration_minutes
+            "title": test_data['title'],
+            "num_questions": len(test_data['question_ids']),
+            "estimated_duration_minutes": round(test_data['duration_seconds'] / 60)
         }
         
     except HTTPException as e:
         # Re-raise HTTPExceptions without modification
         raise e
     except Exception as e:
-        import traceback
-        print(f"Error in generate_dynamic_test: {e}")
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("Error in generate_dynamic_test")
         raise HTTPException(status_code=500, detail=f"Error generating test: {str(e)}")
 
 
@@ -1266,8 +1353,7 @@ async def health_check(db: DatabaseManager = Depends(get_db_manager)):
 
 async def generate_dynamic_random_test(config: Dict[str, Any]) -> TestSchema:
     """Generate a random test from question bank."""
-    from app.database import DatabaseManager
-    db = DatabaseManager()
+    db = await get_db_manager()
     
     # Default configuration
     num_questions = config.get('num_questions', 10)
@@ -1283,57 +1369,6 @@ async def generate_dynamic_random_test(config: Dict[str, Any]) -> TestSchema:
         'categories': categories if categories else None
     }
     
-    # Get questions based on criteria
-    print(f"[DEBUG] Generating random test with config: {config}")
-    print(f"[DEBUG] Criteria: {criteria}, user_ip: {user_ip}, num_questions: {num_questions}")
-    
-    try:
-        if failed_questions_only and source_session_id:
-            questions_data = await db.get_failed_questions_from_session(source_session_id, num_questions)
-        elif failed_questions_only:
-            questions_data = await db.get_failed_questions(user_ip, num_questions)
-        else:
-            questions_data = await db.get_questions_by_criteria(criteria, user_ip, num_questions)
-        
-        print(f"[DEBUG] Retrieved {len(questions_data) if questions_data else 0} questions")
-        
-    except Exception as e:
-        print(f"[ERROR] Error getting questions: {e}")
-        import traceback
-        print(f"[ERROR] Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    
-    if not questions_data:
-        print("[DEBUG] No questions found, checking database...")
-        # Debug: check if questions exist at all
-        try:
-            async with db.get_connection() as conn:
-                cursor = await conn.execute("SELECT COUNT(*) FROM questions")
-                total_questions = await cursor.fetchone()
-                print(f"[DEBUG] Total questions in DB: {total_questions[0] if total_questions else 0}")
-        except Exception as debug_e:
-            print(f"[DEBUG] Error checking total questions: {debug_e}")
-        
-        raise HTTPException(status_code=404, detail="No questions available for random test generation")
-    
-    # Convert to QuestionData objects
-    questions = []
-    for i, q_data in enumerate(questions_data):
-        question = QuestionData(
-            id=str(q_data['question_id']),
-            question=q_data['question_text'],
-            options=q_data['options'],
-            correct_answer=q_data['correct_answer'],
-            explanation=q_data.get('explanation', ''),
-            difficulty=DifficultyLevel(q_data.get('difficulty', 'medium')),
-            category=CategoryType(q_data.get('category', 'general')),
-            keywords=q_data.get('keywords', []),
-            estimated_time_seconds=q_data.get('estimated_time_seconds', 90),
-            source_info=q_data.get('source_info', {})
-        )
-        questions.append(question)
-    
-    # Generate test ID
     if failed_questions_only:
         test_type = "failed"
     elif categories:
@@ -1343,212 +1378,172 @@ async def generate_dynamic_random_test(config: Dict[str, Any]) -> TestSchema:
     else:
         test_type = "random"
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    test_id = f"dyn_{test_type}_{timestamp}_{str(uuid.uuid4())[:8]}"
+    try:
+        test_data = await _build_dynamic_test(
+            db, user_ip, test_type, criteria, num_questions,
+            failed=failed_questions_only, source_session_id=source_session_id
+        )
+    except Exception as e:
+        logger.exception("Error getting questions")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     
-    # Create test title
-    if failed_questions_only:
-        title = f"Repasar Errores - {len(questions)} preguntas"
-    elif categories:
-        cats_str = ", ".join(categories[:2]) + ("..." if len(categories) > 2 else "")
-        title = f"Test por Categorías ({cats_str}) - {len(questions)} preguntas"
-    elif difficulty != 'mixed':
-        title = f"Test {difficulty.title()} - {len(questions)} preguntas"
-    else:
-        title = f"Test Aleatorio - {len(questions)} preguntas"
+    if test_data is None:
+        # Debug: check if questions exist at all (only when debug logging is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                async with db.acquire_reader() as conn:
+                    ((total_questions,),) = await conn.execute_fetchall("SELECT COUNT(*) FROM questions")
+                logger.debug("No questions found; total questions in DB: %d", total_questions)
+            except Exception:
+                logger.debug("Error checking total questions", exc_info=True)
+        
+        raise HTTPException(status_code=404, detail="No questions available for random test generation")
     
-    # Calculate estimated duration
-    total_time = sum(q.estimated_time_seconds for q in questions)
-    estimated_duration = max(5, round(total_time / 60))  # minutes, minimum 5
+    from_row = QuestionData.from_row
+    questions = [from_row(q_data) for q_data in test_data['questions']]
     
-    # Create TestSchema
-    test_schema = TestSchema(
-        test_id=test_id,
-        title=title,
+    # Create TestSchema: every value comes from validated questions and typed
+    # locals, so model_construct skips a second validation pass
+    return TestSchema.model_construct(
+        test_id=test_data['test_id'],
+        title=test_data['title'],
         description=f"Test generado dinámicamente con {len(questions)} preguntas.",
         created_at=datetime.now(),
         category=CategoryType("general"),
-        difficulty=DifficultyLevel(difficulty) if difficulty != 'mixed' else DifficultyLevel("mixed"),
-        estimated_duration=estimated_duration,
+        difficulty=DifficultyLevel(difficulty),
+        estimated_duration=max(5, round(test_data['duration_seconds'] / 60)),  # minutes, minimum 5
         passing_grade=70,
         questions=questions
     )
-    
-    # Save dynamic test to database
+
+
+def _dynamic_test_title(count: int, criteria: Dict[str, Any], failed: bool,
+                        source_session_id: Optional[str] = None) -> str:
+    """Display title of a generated test with count questions."""
+    if failed:
+        title = f"Repaso de Errores - {count} preguntas"
+        return f"{title} de sesión {source_session_id}" if source_session_id else title
+    categories = criteria.get('categories')
+    if categories:
+        cats_str = ", ".join(categories[:2]) + ("..." if len(categories) > 2 else "")
+        return f"Test por Categorías ({cats_str}) - {count} preguntas"
+    difficulty = criteria.get('difficulty') or 'mixed'
+    if difficulty != 'mixed':
+        return f"Test {difficulty.title()} - {count} preguntas"
+    return f"Test Aleatorio - {count} preguntas"
+
+
+async def _build_dynamic_test(
+    db: DatabaseManager,
+    user_ip: str,
+    test_type: str,
+    criteria: Dict[str, Any],
+    num_questions: int,
+    failed: bool = False,
+    source_session_id: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Select questions for a generated test and save it to dynamic_tests.
+
+    Failed-question tests draw from the user's (or one session's) wrong
+    answers instead of criteria. Returns None, saving nothing, when no question
+    matches. Run it inside db.transaction() to commit it with a session.
+    """
+    if failed and source_session_id:
+        rows = await db.get_failed_questions_from_session(source_session_id, num_questions)
+    elif failed:
+        rows = await db.get_failed_questions(user_ip, num_questions)
+    else:
+        rows = await db.get_questions_by_criteria(criteria, user_ip, num_questions)
+    if not rows:
+        return None
+    
+    # One pass: selected ids (saved with the test and the session) and the
+    # estimated duration based on question times
+    question_ids = []
+    duration_seconds = 0
+    for row in rows:
+        question_ids.append(row['question_id'])
+        duration_seconds += row.get('estimated_time_seconds') or 90
+    if failed:
+        criteria = {'question_ids': question_ids}
+    
+    test_id = _dynamic_test_id(test_type)
+    title = _dynamic_test_title(len(rows), criteria, failed, source_session_id)
     await db.save_dynamic_test({
         'test_id': test_id,
         'test_type': test_type,
         'test_title': title,
         'criteria': criteria,
-        'question_ids': [q.id for q in questions],
+        'question_ids': question_ids,
         'user_ip': user_ip
     })
-    
-    return test_schema
+    return {
+        'test_id': test_id,
+        'title': title,
+        'questions': rows,
+        'question_ids': question_ids,
+        'duration_seconds': duration_seconds,
+    }
 
 
 # Utility Functions
+def _dynamic_test_id(test_type: str) -> str:
+    """Id for a generated test saved in dynamic_tests.
+
+    Nanosecond clock plus a per-process counter: unique without formatting a
+    date or reading random bytes.
+    """
+    return f"dyn_{test_type}_{time.time_ns():x}_{next(_test_id_counter):x}"
+
+
 def generate_session_id() -> str:
-    """Generate unique session ID."""
-    return str(uuid.uuid4())
+    """Generate unique session ID (nanosecond timestamp plus 64 random bits)."""
+    return f"session_{time.time_ns():020d}_{os.urandom(8).hex()}"
+
+
+def _first_hop(header: str) -> str:
+    """First address of a comma-separated forwarding header."""
+    comma = header.find(',')
+    return (header[:comma] if comma != -1 else header).strip()
+
+
+# Forwarding headers in priority order, as raw (lower-case) ASGI header names
+_CLIENT_IP_HEADERS = {b"x-forwarded-for": 0, b"x-forwarded": 1, b"x-real-ip": 2}
 
 
 def get_client_ip(request: Request) -> str:
-    """Get client IP address."""
+    """Get client IP address (resolved once per request)."""
+    scope = request.scope
+    client_ip = scope.get("client_ip")
+    if client_ip is None:
+        client_ip = scope["client_ip"] = _resolve_client_ip(scope)
+    return client_ip
+
+
+def _resolve_client_ip(scope: dict) -> str:
+    """Client address from forwarding headers or the ASGI peer."""
+    # One pass over the raw headers instead of a lookup per header name;
+    # the first occurrence of each header wins, as with Headers.get()
+    found: List[Optional[bytes]] = [None, None, None]
+    for name, value in scope["headers"]:
+        slot = _CLIENT_IP_HEADERS.get(name)
+        if slot is not None and found[slot] is None:
+            found[slot] = value
+    
     # Check for forwarded headers first (for proxies)
-    forwarded_for = request.headers.get("X-Forwarded-For")
+    forwarded_for, forwarded, real_ip = found
     if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
+        return _first_hop(forwarded_for.decode("latin-1"))
     
-    forwarded = request.headers.get("X-Forwarded")
     if forwarded:
-        return forwarded.split(",")[0].strip()
+        return _first_hop(forwarded.decode("latin-1"))
     
-    real_ip = request.headers.get("X-Real-IP")
     if real_ip:
-        return real_ip
+        return real_ip.decode("latin-1")
     
     # Fallback to direct client
-    return request.client.host if request.client else "unknown"
-
-
-async def get_failed_questions_from_session(session_id: str) -> List[QuestionData]:
-    """Get failed questions from a specific session."""
-    from app.database import get_db_manager
-    
-    db = await get_db_manager()
-    
-    try:
-        # Get session data
-        session_data = await db.get_session(session_id)
-        if not session_data:
-            return []
-        
-        # Get session answers - only the incorrect ones
-        answers = await db.get_session_answers(session_id)
-        failed_question_ids = [answer['question_id'] for answer in answers if not answer['is_correct']]
-        
-        if not failed_question_ids:
-            return []
-        
-        # Get the original test to retrieve the failed questions
-        test_schema = app.state.tests_cache.get(session_data['test_id'])
-        if not test_schema:
-            return []
-        
-        # Extract failed questions
-        failed_questions = []
-        for question in test_schema.questions:
-            if question.id in failed_question_ids:
-                # Create a copy to avoid modifying the original
-                import copy
-                failed_question = copy.deepcopy(question)
-                failed_questions.append(failed_question)
-        
-        return failed_questions
-        
-    except Exception as e:
-        print(f"Error getting failed questions from session {session_id}: {e}")
-        return []
-
-
-async def generate_random_test(config: Dict[str, Any]) -> TestSchema:
-    """Generate a random test from existing questions."""
-    import random
-    from datetime import datetime
-    
-    # Configuration with defaults
-    num_questions = config.get('num_questions', settings.random_test_default_questions)
-    categories = config.get('categories', [])
-    difficulties = config.get('difficulties', [])
-    exclude_test_ids = config.get('exclude_test_ids', [])
-    allow_repeats = config.get('allow_repeats', False)
-    source_session_id = config.get('source_session_id')
-    failed_questions_only = config.get('failed_questions_only', False)
-    
-    # Collect all available questions
-    all_questions = []
-    source_test_ids = []
-    
-    # Special case: Generate test with failed questions from a specific session
-    if failed_questions_only and source_session_id:
-        all_questions = await get_failed_questions_from_session(source_session_id)
-        if not all_questions:
-            raise HTTPException(status_code=400, detail="No hay preguntas falladas en la sesión especificada o la sesión no existe")
-        source_test_ids = [f"session_{source_session_id}"]
-    else:
-        # Regular random test generation
-        for test_id, test_schema in app.state.tests_cache.items():
-            if test_id in exclude_test_ids:
-                continue
-                
-            source_test_ids.append(test_id)
-            
-            for question in test_schema.questions:
-                # Filter by category if specified
-                if categories:
-                    question_category = question.category.value if hasattr(question.category, 'value') else str(question.category)
-                    if question_category not in categories:
-                        continue
-                
-                # Filter by difficulty if specified
-                if difficulties:
-                    question_difficulty = question.difficulty.value if hasattr(question.difficulty, 'value') else str(question.difficulty)
-                    if question_difficulty not in difficulties:
-                        continue
-                
-                all_questions.append(question)
-    
-    if len(all_questions) < num_questions:
-        num_questions = len(all_questions)
-    
-    if not all_questions:
-        raise HTTPException(status_code=400, detail="No questions available for random test generation")
-    
-    # Select random questions
-    if allow_repeats:
-        selected_questions = random.choices(all_questions, k=num_questions)
-    else:
-        selected_questions = random.sample(all_questions, num_questions)
-    
-    # Reassign IDs to avoid conflicts
-    for i, question in enumerate(selected_questions):
-        question.id = i + 1
-    
-    # Generate random test ID
-    test_id = f"random_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-    
-    # Set title and description based on test type
-    if failed_questions_only:
-        title = f"Repaso de Errores ({num_questions} preguntas)"
-        description = f"Test de repaso con preguntas falladas de la sesión {source_session_id}"
-    else:
-        title = f"Test Aleatorio ({num_questions} preguntas)"
-        description = "Test generado aleatoriamente a partir de preguntas existentes"
-    
-    # Create test schema
-    random_test = TestSchema(
-        test_id=test_id,
-        title=title,
-        description=description,
-        created_at=datetime.now(),
-        category="general",
-        difficulty="mixed",
-        estimated_duration=num_questions * 2,  # 2 minutes per question
-        instructions="Responde todas las preguntas. Se evaluará al finalizar el test.",
-        passing_grade=settings.default_passing_grade,
-        questions=selected_questions,
-        scoring={
-            "total_points": sum(q.points for q in selected_questions),
-            "passing_threshold": settings.default_passing_grade
-        },
-        statistics={
-            "source_tests": len(source_test_ids),
-            "total_source_questions": len(all_questions)
-        }
-    )
-    
-    return random_test
+    client = scope.get("client")
+    return client[0] if client else "unknown"
 
 
 async def load_all_tests() -> Dict[str, TestSchema]:
@@ -1562,11 +1557,7 @@ async def load_all_tests() -> Dict[str, TestSchema]:
         if filename.endswith('.json'):
             file_path = os.path.join(settings.tests_dir, filename)
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    test_data = json.load(f)
-                
-                # Convert to TestSchema
-                test_schema = TestSchema(**test_data)
+                test_schema = _read_test_file(file_path)
                 tests_cache[test_schema.test_id] = test_schema
                 
             except Exception as e:
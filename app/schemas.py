@@ -71,6 +71,22 @@ class QuestionData(BaseModel):
     points: int = Field(default=1, ge=1, le=5)
     estimated_time_seconds: int = Field(default=90, ge=30, le=300)
 
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "QuestionData":
+        """Build from a question dict as returned by the database manager."""
+        return cls(
+            id=str(row['question_id']),
+            question=row['question_text'],
+            options=row['options'],
+            correct_answer=row['correct_answer'],
+            explanation=row.get('explanation', ''),
+            difficulty=DifficultyLevel(row.get('difficulty', 'medium')),
+            category=CategoryType(row.get('category', 'general')),
+            keywords=row.get('keywords', []),
+            estimated_time_seconds=row.get('estimated_time_seconds', 90),
+            source_info=row.get('source_info', {})
+        )
+
 
 class TestMetadata(BaseModel):
     """Test metadata information."""